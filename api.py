@@ -1,15 +1,27 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import datetime
-import json
-import os
+import async_db
+import player_index
+import resource_manager
+import scoring
 import tennis_config
 
+@asynccontextmanager
+async def lifespan(app):
+    # engine and resources are created below, at import
+    resources.start()
+    yield
+    await engine.dispose()
+
 # --- CONFIGURATION ---
-app = FastAPI(title="Tennis Brain API", version="1.0.0")
+app = FastAPI(title="Tennis Brain API", version="1.0.0", lifespan=lifespan)
+MAX_PREDICT_ITEMS = 1000  # Matchups per /predict request
+SURFACES = ("Hard", "Clay", "Grass", "Carpet")
 
 # --- CORS MIDDLEWARE (UPDATED) ---
 # We are allowing ALL origins ("*") to fix the connection issue.
@@ -19,10 +31,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows GET, POST, OPTIONS, etc.
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],  # /players paging, readable by the frontend
 )
 
-# Connect to Cloud DB
-engine = create_engine(tennis_config.DB_URL)
+# Connect to Cloud DB (async, pooled; see async_db for the pooler settings)
+engine = async_db.engine(tennis_config.DB_URL)
+
+# Live player state + model, hot-reloaded when the daily update rewrites them
+resources = resource_manager.ResourceManager()
+
+# /predict answers repeat matchups from memory until the state or model changes
+prediction_cache = scoring.PredictionCache()
 
 # --- DATA MODELS (Response Schemas) ---
 class Matchup(BaseModel):
@@ -58,51 +77,142 @@ class PlayerStats(BaseModel):
     surface_clay: float
     surface_grass: float
 
+class PredictItem(BaseModel):
+    p1: str
+    p2: str
+    surface: str = "Hard"
+
+class PredictRequest(BaseModel):
+    # Either one matchup (p1/p2/surface) or a batch (items)
+    p1: Optional[str] = None
+    p2: Optional[str] = None
+    surface: str = "Hard"
+    items: Optional[List[PredictItem]] = None
+    include_features: bool = True
+
+class Prediction(BaseModel):
+    p1: str
+    p2: str
+    surface: str
+    prob_p1: Optional[float] = None
+    prob_p2: Optional[float] = None
+    fair_odds_p1: Optional[float] = None
+    fair_odds_p2: Optional[float] = None
+    features: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
+
+class PredictResponse(BaseModel):
+    version: str
+    predictions: List[Prediction]
+
 # --- ENDPOINTS ---
 
 @app.get("/")
 def health_check():
-    return {"status": "online", "message": "Tennis Brain API is operational"}
+    return {"status": "online", "message": "Tennis Brain API is operational", "version": resources.current().version}
 
 @app.get("/players", response_model=List[PlayerStats])
-def get_all_players():
+def get_all_players(sort: str = "elo", min_matches: int = player_index.MIN_MATCHES,
+                    limit: Optional[int] = Query(None, ge=1), cursor: Optional[str] = None):
     """
-    Returns the full database of players from players_live.json
+    Returns players with at least min_matches matches, best first by sort
+    (elo, form, clutch, surface_hard, surface_clay, surface_grass).
+    With a limit, the X-Next-Cursor header holds the cursor for the next page
+    (absent on the last one); X-Total-Count is the number of players passing
+    the filter. Served from indexes built once per player state version.
     """
     try:
-        # Ensure file exists
-        if not os.path.exists("players_live.json"):
-            return []
-            
-        with open("players_live.json", "r") as f:
-            data = json.load(f)
-            
-        players = []
-        for name, stats in data.items():
-            # Filter for active players with decent history (optional but cleaner)
-            if stats.get('matches', 0) > 10:
-                players.append({
-                    "name": name,
-                    "elo": int(stats.get('elo', 1500)),
-                    "form": stats.get('form_20', 0.5),
-                    "clutch": stats.get('pressure', 0.5),
-                    "surface_hard": stats.get('surface_hard', 0.5),
-                    "surface_clay": stats.get('surface_clay', 0.5),
-                    "surface_grass": stats.get('surface_grass', 0.5)
-                })
-        
-        # Sort by Elo descending
-        return sorted(players, key=lambda x: x['elo'], reverse=True)
-        
+        index = resources.current().player_index
+        if sort == "elo" and min_matches == player_index.MIN_MATCHES and limit is None and cursor is None:
+            # Default listing: the blob serialized at load time
+            return Response(content=index.body, media_type="application/json", headers={"X-Total-Count": str(index.total)})
+        body, next_cursor, total = index.page(sort, min_matches, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error fetching players: {e}")
         # Raise HTTP exception so frontend catches it
         raise HTTPException(status_code=500, detail=str(e))
 
+    headers = {"X-Total-Count": str(total)}
+    if next_cursor: headers["X-Next-Cursor"] = next_cursor
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/players/search", response_model=List[PlayerStats])
+def search_players(q: str, limit: int = Query(10, ge=1, le=50)):
+    """
+    Typeahead: players whose name words start with the words of q
+    ('sinn', 'j sin', 'sinner j'), accents ignored, best rated first.
+    Falls back to fuzzy matching for typos.
+    """
+    try:
+        body = resources.current().player_index.search_page(q, limit)
+    except Exception as e:
+        print(f"Error searching players: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=body, media_type="application/json")
+
+@app.post("/predict", response_model=PredictResponse)
+def predict_matchups(req: PredictRequest):
+    """
+    Win probabilities for one matchup or a batch, scored in a single model call
+    against the loaded player state and model. Names must match the database
+    (see /players/search); an unknown name only fails its own item.
+    With include_features, each prediction lists the feature values used.
+    """
+    if req.items is not None and req.p1 is not None:
+        raise HTTPException(status_code=400, detail="Send either p1/p2/surface or items, not both")
+    items = req.items if req.items is not None else \
+        ([PredictItem(p1=req.p1, p2=req.p2, surface=req.surface)] if req.p1 and req.p2 else None)
+    if not items:
+        raise HTTPException(status_code=400, detail="Nothing to predict: give p1 and p2, or items")
+    if len(items) > MAX_PREDICT_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PREDICT_ITEMS} items per request")
+
+    # One snapshot for the whole request, so all items see the same state and model
+    res = resources.current()
+    if res.scorer is None or not res.players:
+        raise HTTPException(status_code=503, detail="Model or player state not loaded yet")
+
+    predictions, slate, slots = [], [], []
+    for item in items:
+        surface = item.surface.capitalize()
+        out = Prediction(p1=item.p1, p2=item.p2, surface=surface)
+        missing = [n for n in (item.p1, item.p2) if n not in res.players]
+        if missing:
+            hits = res.player_index.search.search(missing[0], 3)
+            out.error = f"Unknown player '{missing[0]}'" + (f" (did you mean {', '.join(hits)}?)" if hits else "")
+        elif item.p1 == item.p2:
+            out.error = "p1 and p2 are the same player"
+        elif surface not in SURFACES:
+            out.error = f"Unknown surface '{item.surface}' (use {', '.join(SURFACES)})"
+        else:
+            slate.append((item.p1, item.p2, surface))
+            slots.append(out)
+        predictions.append(out)
+
+    try:
+        if req.include_features:
+            probs, X = res.scorer.explain_slate(res.players, slate, res.pressure)
+        else:
+            probs = prediction_cache.score_slate(res.scorer, res.players, slate, res.state_version, res.pressure)
+    except Exception as e:
+        print(f"Error scoring matchups: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    columns = res.scorer.columns
+    for k, (out, prob) in enumerate(zip(slots, probs.tolist())):
+        out.prob_p1, out.prob_p2 = prob, 1.0 - prob
+        out.fair_odds_p1, out.fair_odds_p2 = round(1 / prob, 2), round(1 / (1 - prob), 2)
+        if req.include_features:
+            out.features = dict(zip(columns, X[k].tolist()))
+
+    return PredictResponse(version=res.version, predictions=predictions)
+
 @app.get("/matchups", response_model=List[Matchup])
-def get_live_matchups():
+async def get_live_matchups():
     try:
-        with engine.connect() as conn:
+        async with engine.connect() as conn:
             # Query for live bets
             query = """
                 SELECT id, start_time, tournament, surface, player_1, player_2, 
@@ -111,52 +221,53 @@ def get_live_matchups():
                 WHERE status IN ('Tracking', 'Pending') 
                 ORDER BY tournament, start_time ASC
             """
-            result = conn.execute(text(query)).fetchall()
+            result = (await conn.execute(text(query))).fetchall()
+        # The connection is back in the pool here; rows are formatted without holding it
+        
+        matchups = []
+        for row in result:
+            dt = datetime.datetime.fromtimestamp(row.start_time)
+            
+            prob_p1 = row.model_prob
+            prob_p2 = 1.0 - prob_p1
             
-            matchups = []
-            for row in result:
-                dt = datetime.datetime.fromtimestamp(row.start_time)
-                
-                prob_p1 = row.model_prob
-                prob_p2 = 1.0 - prob_p1
-                
-                # Logic for Odds Display
-                odds_1 = row.odds if row.bet_on == row.player_1 else None
-                odds_2 = row.odds if row.bet_on == row.player_2 else None
-                
-                # Logic for EV Display
-                current_ev = 0.0
-                if row.bet_on == row.player_1:
-                    current_ev = (row.odds * prob_p1) - 1
-                elif row.bet_on == row.player_2:
-                    current_ev = (row.odds * prob_p2) - 1
-
-                matchups.append({
-                    "id": row.id,
-                    "date": dt.strftime("%Y-%m-%d"),
-                    "time": dt.strftime("%H:%M"),
-                    "tournament": row.tournament,
-                    "surface": row.surface,
-                    "player_1": row.player_1,
-                    "player_2": row.player_2,
-                    "model_prob_p1": prob_p1,
-                    "model_prob_p2": prob_p2,
-                    "odds_p1": odds_1,
-                    "odds_p2": odds_2,
-                    "value_bet_on": row.bet_on,
-                    "ev": round(current_ev, 3),
-                    "status": row.status
-                })
-            return matchups
+            # Logic for Odds Display
+            odds_1 = row.odds if row.bet_on == row.player_1 else None
+            odds_2 = row.odds if row.bet_on == row.player_2 else None
+            
+            # Logic for EV Display
+            current_ev = 0.0
+            if row.bet_on == row.player_1:
+                current_ev = (row.odds * prob_p1) - 1
+            elif row.bet_on == row.player_2:
+                current_ev = (row.odds * prob_p2) - 1
+
+            matchups.append({
+                "id": row.id,
+                "date": dt.strftime("%Y-%m-%d"),
+                "time": dt.strftime("%H:%M"),
+                "tournament": row.tournament,
+                "surface": row.surface,
+                "player_1": row.player_1,
+                "player_2": row.player_2,
+                "model_prob_p1": prob_p1,
+                "model_prob_p2": prob_p2,
+                "odds_p1": odds_1,
+                "odds_p2": odds_2,
+                "value_bet_on": row.bet_on,
+                "ev": round(current_ev, 3),
+                "status": row.status
+            })
+        return matchups
             
     except Exception as e:
         print(f"Error fetching matchups: {e}")
         raise HTTPException(status_code=500, detail="Database connection failed")
 
 @app.get("/history", response_model=List[BetResult])
-def get_betting_history():
+async def get_betting_history():
     try:
-        with engine.connect() as conn:
+        async with engine.connect() as conn:
             query = """
                 SELECT date, tournament, bet_on, odds, result, profit 
                 FROM bets 
@@ -164,19 +275,19 @@ def get_betting_history():
                 ORDER BY date DESC 
                 LIMIT 100
             """
-            result = conn.execute(text(query)).fetchall()
-            
-            history = []
-            for row in result:
-                history.append({
-                    "date": row.date,
-                    "tournament": row.tournament,
-                    "bet_on": row.bet_on,
-                    "odds": row.odds,
-                    "result": row.result,
-                    "profit": row.profit
-                })
-            return history
+            result = (await conn.execute(text(query))).fetchall()
+        
+        history = []
+        for row in result:
+            history.append({
+                "date": row.date,
+                "tournament": row.tournament,
+                "bet_on": row.bet_on,
+                "odds": row.odds,
+                "result": row.result,
+                "profit": row.profit
+            })
+        return history
             
     except Exception as e:
         print(f"Error fetching history: {e}")
@@ -0,0 +1,57 @@
+import os
+from uuid import uuid4
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Import Helpers
+import tennis_config
+
+# --- CONFIGURATION ---
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10)) # Connections kept open per API process
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10)) # Extra connections allowed under bursts
+POOL_TIMEOUT = 10 # Seconds a request waits for a free connection before failing
+POOL_RECYCLE = 1800 # Reopen connections older than this (the pooler drops idle ones)
+
+# Async driver for each database the API can point at
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'postgres': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+def async_url(url):
+    """DB_URL with its async driver ('postgresql://...' -> 'postgresql+asyncpg://...')."""
+    url = make_url(url)
+    backend = url.drivername.split('+')[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{url.drivername}'")
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend != 'sqlite':
+        # SQLAlchemy's own per-connection prepared statement cache (see engine())
+        url = url.update_query_dict({'prepared_statement_cache_size': '0'})
+    return url
+
+def engine(url=tennis_config.DB_URL, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW):
+    """
+    Async engine with an explicitly sized pool, pre-ping (a dead connection is
+    replaced before a request gets it) and recycling.
+
+    DB_URL is Supabase's transaction-mode pooler (pgbouncer, port 6543): each
+    transaction may run on a different server connection, so a prepared
+    statement cached on one is missing (or clashes by name) on the next.
+    asyncpg's and SQLAlchemy's statement caches are therefore off, and
+    statements asyncpg still prepares get unique names. SQLAlchemy's
+    compiled-SQL cache is client side and stays on.
+    """
+    url = async_url(url)
+    connect_args = {}
+    if url.get_backend_name() == 'postgresql':
+        connect_args = {
+            'statement_cache_size': 0,
+            'prepared_statement_name_func': lambda: f"__asyncpg_{uuid4()}__"
+        }
+    return create_async_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args=connect_args
+    )
@@ -1,21 +1,21 @@
 import time
-import pandas as pd
-import json
 import requests
 import datetime
-import os
-import xgboost as xgb
 import numpy as np
 from rapidfuzz import process, fuzz
 from sqlalchemy import create_engine, text
 
 # Import Helpers
+import name_resolver
 import pinnacle_client
+import resource_manager
+import scoring
 import tennis_config
 
 # --- CONFIGURATION ---
 POLL_INTERVAL = 600  # 10 Minutes
 MIN_EV_THRESHOLD = 0.05  # 5% EV
+ODDS_MATCH_THRESHOLD = 85  # Min name score for the fuzzy odds fallback
 
 # --- SETUP & LOGGING ---
 def log(msg):
@@ -24,6 +24,10 @@ def log(msg):
 # Initialize Database Connection Engine (Cloud)
 engine = create_engine(tennis_config.DB_URL)
 
+# Probabilities only change when players_live.json or the model does, so
+# each cycle only scores matchups it hasn't seen for the loaded versions
+prediction_cache = scoring.PredictionCache()
+
 def init_db():
     # PostgreSQL syntax: SERIAL is used for auto-incrementing IDs
     # We add a check to ensure the table exists with the correct columns
@@ -69,24 +73,18 @@ def repair_db():
 
 # --- LOAD RESOURCES ---
 def load_resources():
+    """
+    Loads players, pressure stats and the model, and keeps watching them:
+    after the morning update the new files are loaded in the background and
+    picked up at the start of the next cycle, without a restart.
+    """
     log("Loading resources (Players, Model)...")
-    if not os.path.exists("players_live.json"): 
+    manager = resource_manager.ResourceManager(log=log)
+    if not manager.current().players:
         log("ERROR: players_live.json not found.")
-        return None, None, None
-    
-    with open("players_live.json", "r") as f: players = json.load(f)
-    
-    pressure = {}
-    if os.path.exists("player_pressure_stats.json"):
-        with open("player_pressure_stats.json", "r") as f: pressure = json.load(f)
-            
-    model = xgb.XGBClassifier()
-    if os.path.exists("tennis_model_god_mode.json"): 
-        model.load_model("tennis_model_god_mode.json")
-    else: 
-        model = None
-        
-    return players, pressure, model
+        return None
+    manager.start()
+    return manager
 
 # --- CORE LOGIC ---
 def fetch_schedule_with_status():
@@ -131,61 +129,85 @@ def fetch_schedule_with_status():
     
     return matches
 
-def run_prediction(players, pressure_stats, model, db_names, p1_name, p2_name, surface):
-    p1_match = process.extractOne(p1_name, db_names, scorer=fuzz.token_set_ratio)
-    p2_match = process.extractOne(p2_name, db_names, scorer=fuzz.token_set_ratio)
-    
-    if not p1_match or not p2_match: return None, None, 0.5
-    
-    p1_db, p2_db = p1_match[0], p2_match[0]
-    p1, p2 = players[p1_db], players[p2_db]
-    
-    # Features
-    ht_diff = p1.get('height', 185) - p2.get('height', 185)
-    fatigue_diff = p1.get('fatigue', 0) - p2.get('fatigue', 0)
-    p1_clutch = pressure_stats.get(p1_db, p1.get('pressure', 0.60))
-    p2_clutch = pressure_stats.get(p2_db, p2.get('pressure', 0.60))
-    
-    is_hard = 1 if surface == 'Hard' else 0
-    is_clay = 1 if surface == 'Clay' else 0
-    is_grass = 1 if surface == 'Grass' else 0
-    is_carpet = 1 if surface == 'Carpet' else 0
-
-    input_data = {
-        'p1_elo': [p1['elo']], 'p2_elo': [p2['elo']],
-        'p1_form': [p1['form_20']], 'p2_form': [p2['form_20']],
-        'p1_momentum': [p1['momentum_5']], 'p2_momentum': [p2['momentum_5']],
-        'p1_serve': [p1['serve']], 'p2_serve': [p2['serve']],
-        'p1_return': [p1['return']], 'p2_return': [p2['return']],
-        'p1_exp': [np.log1p(p1['matches'])], 'p2_exp': [np.log1p(p2['matches'])],
-        'p1_pressure': [p1_clutch], 'p2_pressure': [p2_clutch],
-        'fatigue_diff': [fatigue_diff], 'height_diff': [ht_diff],
-        'p1_is_lefty': [p1.get('hand', 0)], 'p2_is_lefty': [p2.get('hand', 0)],
-        'surface_Carpet': [is_carpet], 'surface_Clay': [is_clay], 
-        'surface_Grass': [is_grass], 'surface_Hard': [is_hard]
-    }
-    
-    df = pd.DataFrame(input_data)
-    prob = model.predict_proba(df)[0][1]
-    return p1_db, p2_db, prob
-
-def get_match_odds(p1, p2, odds_df):
-    if odds_df is None or odds_df.empty: return None, None
-    match1 = process.extractOne(p1, odds_df['Player 1'], scorer=fuzz.token_set_ratio)
-    if not match1 or match1[1] < 85: return None, None
-    row_idx = match1[2]
-    odds_p2 = odds_df.iloc[row_idx]['Player 2']
-    if fuzz.token_set_ratio(p2, odds_p2) > 85:
-        return odds_df.iloc[row_idx]['Odds 1'], odds_df.iloc[row_idx]['Odds 2']
-    return None, None
+def run_predictions(players, pressure_stats, model, state_version, resolver, matches):
+    """
+    Scores the slate's unseen matchups with one model call (the rest come from
+    prediction_cache). Returns (p1_db, p2_db, prob) per match, aligned with
+    matches; (None, None, 0.5) if a name didn't resolve.
+    """
+    # Both sides of every match resolved in one batch
+    names = resolver.resolve_many([m['p1'] for m in matches] + [m['p2'] for m in matches], 'tennisapi')
+    resolver.save()
+    resolved = []
+    for m, (p1_db, _), (p2_db, _) in zip(matches, names[:len(matches)], names[len(matches):]):
+        resolved.append((p1_db, p2_db, m['surface']) if p1_db and p2_db else None)
+
+    slate = [r for r in resolved if r]
+    probs = iter(prediction_cache.score_slate(model, players, slate, state_version, pressure_stats))
+    return [(r[0], r[1], next(probs)) if r else (None, None, 0.5) for r in resolved]
+
+class OddsIndex:
+    """
+    One cycle's Pinnacle moneylines, keyed by normalized (player, player) in
+    both orders, so a lookup is a dict hit whichever side Pinnacle lists as
+    home. Each line is keyed by its Pinnacle names and by the DB names they
+    resolve to (alias table, source 'pinnacle'). A pair that misses gets one
+    fuzzy pass over every line (both orientations), and the outcome is
+    remembered for the rest of the cycle.
+    """
+    def __init__(self, odds_df, resolver=None):
+        # get_live_odds returns a DataFrame, or {} / None on errors
+        if odds_df is None or len(odds_df) == 0: odds_df = None
+        self.home = list(odds_df['Player 1']) if odds_df is not None else []
+        self.away = list(odds_df['Player 2']) if odds_df is not None else []
+        self.odds = list(zip(odds_df['Odds 1'], odds_df['Odds 2'])) if odds_df is not None else []
+        self.normalized = [name_resolver.normalize(n) for n in self.home + self.away]
+
+        self.by_pair = {}
+        n = len(self.home)
+        for r, (o1, o2) in enumerate(self.odds):
+            self.add(self.normalized[r], self.normalized[n + r], o1, o2)
+        if resolver and n:
+            found = resolver.resolve_many(self.home + self.away, 'pinnacle', ODDS_MATCH_THRESHOLD)
+            resolver.save()
+            for r, (o1, o2) in enumerate(self.odds):
+                if found[r][0] and found[n + r][0]:
+                    self.add(name_resolver.normalize(found[r][0]), name_resolver.normalize(found[n + r][0]), o1, o2)
+
+    def add(self, home, away, o1, o2):
+        # First line wins if Pinnacle lists a pair twice
+        self.by_pair.setdefault((home, away), (o1, o2))
+        self.by_pair.setdefault((away, home), (o2, o1))
+
+    def __len__(self):
+        return len(self.odds)
+
+    def lookup(self, p1, p2):
+        """(odds on p1, odds on p2), or (None, None) if Pinnacle has no line for the pair."""
+        key = (name_resolver.normalize(p1), name_resolver.normalize(p2))
+        if key not in self.by_pair:
+            self.by_pair[key] = self.fuzzy(*key)
+            if self.by_pair[key] != (None, None):
+                self.by_pair[key[::-1]] = self.by_pair[key][::-1]
+        return self.by_pair[key]
+
+    def fuzzy(self, p1, p2):
+        n = len(self.odds)
+        if not n: return None, None
+        scores = process.cdist([p1, p2], self.normalized, scorer=fuzz.token_set_ratio, workers=-1)
+        # A line fits if both players clear the threshold on their sides
+        as_home = np.minimum(scores[0, :n], scores[1, n:])
+        as_away = np.minimum(scores[0, n:], scores[1, :n])
+        r = int(np.argmax(np.maximum(as_home, as_away)))
+        if max(as_home[r], as_away[r]) < ODDS_MATCH_THRESHOLD: return None, None
+        o1, o2 = self.odds[r]
+        return (o1, o2) if as_home[r] >= as_away[r] else (o2, o1)
 
 # --- MAIN LOOP ---
 def main_loop():
     init_db()
-    players, pressure, model = load_resources()
-    if not players: return
-
-    db_names = list(players.keys())
+    resources = load_resources()
+    if not resources: return
 
     # --- AUTO REPAIR CHECK ---
     # We check if the table is readable. If not, we repair it.
@@ -203,21 +225,28 @@ def main_loop():
         api_matches = fetch_schedule_with_status()
         log(f"Fetched {len(api_matches)} matches from API.")
         
-        # Call the new Pinnacle Client file
-        odds_df = pinnacle_client.get_live_odds()
-        log(f"Fetched Live Odds ({len(odds_df)} markets).")
+        # One snapshot per cycle: a reload in the background only takes effect at the next cycle
+        res = resources.current()
+
+        # Call the new Pinnacle Client file; indexed once, looked up per match
+        odds = OddsIndex(pinnacle_client.get_live_odds(), res.resolver)
+        log(f"Fetched Live Odds ({len(odds)} markets).")
 
         current_time = int(time.time())
 
+        # 2. Score the whole slate in one model call
+        hits = prediction_cache.hits
+        predictions = run_predictions(res.players, res.pressure, res.scorer, res.state_version, res.resolver, api_matches)
+        log(f"Scored {len(api_matches)} matches ({prediction_cache.hits - hits} from cache).")
+
         # Establish DB Connection for this cycle
         # We use a context manager to ensure the connection is closed after each cycle
         with engine.connect() as conn:
             
-            for m in api_matches:
-                p1_db, p2_db, prob = run_prediction(players, pressure, model, db_names, m['p1'], m['p2'], m['surface'])
+            for m, (p1_db, p2_db, prob) in zip(api_matches, predictions):
                 if not p1_db: continue
 
-                o1, o2 = get_match_odds(p1_db, p2_db, odds_df)
+                o1, o2 = odds.lookup(p1_db, p2_db)
                 
                 ev1 = (prob * o1) - 1 if o1 else -1
                 ev2 = ((1-prob) * o2) - 1 if o2 else -1
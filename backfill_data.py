@@ -89,8 +89,8 @@ def backfill_range():
     
     # UPDATE RATINGS
     print("Recalculating Player Ratings...")
-    import save_current_state_v4
-    save_current_state_v4.save_state()
+    import save_current_state
+    save_current_state.save_state()
 
 if __name__ == "__main__":
     backfill_range()
\ No newline at end of file
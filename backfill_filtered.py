@@ -145,10 +145,10 @@ def backfill_filtered():
     
     # Update ratings immediately
     try:
-        import save_current_state_v4
-        save_current_state_v4.save_state()
+        import save_current_state
+        save_current_state.save_state()
     except ImportError:
-        print("Could not auto-run save_current_state_v4. Please run it manually.")
+        print("Could not auto-run save_current_state. Please run it manually.")
 
 if __name__ == "__main__":
     backfill_filtered()
\ No newline at end of file
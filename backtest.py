@@ -0,0 +1,147 @@
+import numpy as np
+import xgboost as xgb
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.metrics import accuracy_score, log_loss
+
+# Import Helpers
+import feature_store
+import training_data
+from train_model_v2 import PARAMS, N_ESTIMATORS, EARLY_STOPPING_ROUNDS
+
+# --- CONFIGURATION ---
+DATA_DIR = feature_store.FEATURE_DIR
+RESULTS_FILE = "backtest_results.json"
+FOLDS = 8          # Number of walk-forward test windows
+STEP_MONTHS = 3    # Length of each test window (3 = quarterly, 1 = monthly)
+VALID_DAYS = 180   # Tail of each training window held out for early stopping
+CALIBRATION_BINS = 10
+
+def make_folds(columns, folds=FOLDS, step_months=STEP_MONTHS):
+    """
+    Walk-forward cutoffs ending at the last stored month. Fold i trains on
+    everything before cutoff_i and is scored on [cutoff_i, cutoff_i + step).
+    Returns [(cutoff, end)] as 'YYYY-MM-DD' strings, oldest first.
+    """
+    dates = np.asarray(columns['date'])
+    if len(dates) == 0: return []
+    last_month = np.datetime64(int(dates[-1]), 'D').astype('datetime64[M]')
+    end = last_month + 1
+    starts = [end - step_months * (folds - i) for i in range(folds)]
+    return [(str(s.astype('datetime64[D]')), str((s + step_months).astype('datetime64[D]'))) for s in starts]
+
+def calibration(y, probs, bins=CALIBRATION_BINS):
+    """Per probability bin: count, summed prediction and summed outcome (so folds can be pooled)."""
+    idx = np.minimum((probs * bins).astype(int), bins - 1)
+    return {
+        'count': np.bincount(idx, minlength=bins).tolist(),
+        'pred_sum': np.bincount(idx, weights=probs, minlength=bins).tolist(),
+        'hit_sum': np.bincount(idx, weights=y, minlength=bins).tolist()
+    }
+
+def expected_calibration_error(cal):
+    count = np.asarray(cal['count'], dtype=float)
+    if count.sum() == 0: return float('nan')
+    gap = np.abs(np.asarray(cal['pred_sum']) - np.asarray(cal['hit_sum']))
+    return float(gap.sum() / count.sum())
+
+def run_fold(fold):
+    """
+    Trains and scores one fold. Runs in a worker process: the store is
+    re-opened there, so every worker maps the same files and reads them
+    through the shared page cache instead of receiving pickled copies.
+    """
+    path, cutoff, end, rounds, nthread = fold
+    _, columns = feature_store.open_store(path)
+
+    valid_start = training_data.to_day(cutoff) - VALID_DAYS
+    train_rows = training_data.rows_between(columns, None, valid_start)
+    valid_rows = training_data.rows_between(columns, valid_start, cutoff)
+    test_rows = training_data.rows_between(columns, cutoff, end)
+    result = {'cutoff': cutoff, 'end': end, 'train_matches': len(train_rows), 'test_matches': len(test_rows)}
+    if len(train_rows) == 0 or len(valid_rows) == 0 or len(test_rows) == 0:
+        result['skipped'] = "empty train/validation/test window"
+        return result
+
+    dtrain, _ = training_data.build_matrix(columns, train_rows)
+    dvalid, _ = training_data.build_matrix(columns, valid_rows, ref=dtrain)
+    dtest, y_test = training_data.build_matrix(columns, test_rows, ref=dtrain)
+
+    booster = xgb.train(
+        {**PARAMS, 'nthread': nthread}, dtrain,
+        num_boost_round=rounds,
+        evals=[(dvalid, 'validation_0')],
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        verbose_eval=False
+    )
+    probs = training_data.predict_best(booster, dtest)
+
+    cal = calibration(y_test, probs)
+    result.update({
+        'rounds': booster.num_boosted_rounds(),
+        'log_loss': float(log_loss(y_test, probs, labels=[0, 1])),
+        'accuracy': float(accuracy_score(y_test, probs > 0.5)),
+        'brier': float(np.mean((probs - y_test) ** 2)),
+        'ece': expected_calibration_error(cal),
+        'calibration': cal
+    })
+    return result
+
+def run_backtest(path=DATA_DIR, folds=FOLDS, step_months=STEP_MONTHS, workers=None, rounds=N_ESTIMATORS):
+    _, columns = feature_store.open_store(path)
+    windows = make_folds(columns, folds, step_months)
+    del columns
+
+    workers = max(1, min(workers or os.cpu_count(), len(windows) or 1))
+    # Split the cores between workers so parallel folds don't oversubscribe them
+    nthread = max(1, os.cpu_count() // workers)
+    print(f"--- WALK-FORWARD BACKTEST ({len(windows)} folds x {step_months} months, {workers} workers x {nthread} threads) ---")
+
+    jobs = [(path, cutoff, end, rounds, nthread) for cutoff, end in windows]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_fold, jobs))
+
+    print(f"\n{'Test Window':<25}{'Matches':>9}{'Rounds':>8}{'Log Loss':>10}{'Accuracy':>10}{'Brier':>8}{'ECE':>8}")
+    for r in results:
+        window = f"{r['cutoff']} .. {r['end']}"
+        if 'skipped' in r:
+            print(f"{window:<25}{r['test_matches']:>9}  skipped ({r['skipped']})")
+            continue
+        print(f"{window:<25}{r['test_matches']:>9}{r['rounds']:>8}{r['log_loss']:>10.4f}{r['accuracy']:>10.2%}{r['brier']:>8.4f}{r['ece']:>8.4f}")
+
+    scored = [r for r in results if 'skipped' not in r]
+    summary = {}
+    if scored:
+        # Pool the bins over all folds for the overall reliability table
+        pooled = {k: np.sum([r['calibration'][k] for r in scored], axis=0).tolist() for k in scored[0]['calibration']}
+        weights = np.array([r['test_matches'] for r in scored], dtype=float)
+        summary = {
+            'log_loss': float(np.average([r['log_loss'] for r in scored], weights=weights)),
+            'accuracy': float(np.average([r['accuracy'] for r in scored], weights=weights)),
+            'ece': expected_calibration_error(pooled),
+            'calibration': pooled
+        }
+        print(f"\nOverall: Log Loss {summary['log_loss']:.4f} | Accuracy {summary['accuracy']:.2%} | ECE {summary['ece']:.4f}")
+
+        print(f"\n{'Predicted':<14}{'Rows':>8}{'Mean Pred':>11}{'Actual':>9}")
+        for b in range(CALIBRATION_BINS):
+            n = pooled['count'][b]
+            if n == 0: continue
+            label = f"{b / CALIBRATION_BINS:.1f} - {(b + 1) / CALIBRATION_BINS:.1f}"
+            print(f"{label:<14}{n:>8.0f}{pooled['pred_sum'][b] / n:>11.3f}{pooled['hit_sum'][b] / n:>9.3f}")
+
+    with open(RESULTS_FILE, 'w') as f:
+        json.dump({'folds': results, 'summary': summary}, f, indent=1)
+    print(f"\nResults saved to {RESULTS_FILE}")
+    return results, summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest over the feature store.")
+    parser.add_argument('--folds', type=int, default=FOLDS)
+    parser.add_argument('--months', type=int, default=STEP_MONTHS, help="test window length (1 = monthly, 3 = quarterly)")
+    parser.add_argument('--workers', type=int, default=None, help="parallel folds (default: one per core)")
+    parser.add_argument('--rounds', type=int, default=N_ESTIMATORS, help="max boosting rounds per fold")
+    args = parser.parse_args()
+    run_backtest(folds=args.folds, step_months=args.months, workers=args.workers, rounds=args.rounds)
@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import time
+import numpy as np
+
+# --- CONFIGURATION ---
+BENCH_DB = "bench_api.db" # Local SQLite stand-in for the Supabase bets table
+BET_ROWS = 2000
+CONCURRENCY = [1, 10, 50, 100] # Simultaneous clients per run
+REQUESTS_PER_CLIENT = 20
+ENDPOINTS = ['/matchups', '/history']
+
+def seed_db(path, rows=BET_ROWS):
+    """A bets table shaped like auto_tracker's: mostly resolved bets plus a day's live ones."""
+    if os.path.exists(path): os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE bets (
+            id INTEGER PRIMARY KEY, match_id INTEGER UNIQUE, date TEXT, start_time INTEGER,
+            tournament TEXT, surface TEXT, player_1 TEXT, player_2 TEXT, bet_on TEXT,
+            odds REAL, model_prob REAL, stake REAL DEFAULT 1.0, result TEXT, profit REAL,
+            status TEXT DEFAULT 'Tracking', last_update TEXT
+        )
+    """)
+    rng = random.Random(0)
+    now = int(time.time())
+    for i in range(rows):
+        status = rng.choices(['Tracking', 'Pending', 'Resolved'], weights=[2, 1, 97])[0] # ~60 live bets, like a match day
+        won = rng.random() < 0.5
+        odds = round(rng.uniform(1.3, 4.0), 2)
+        conn.execute(
+            "INSERT INTO bets (match_id, date, start_time, tournament, surface, player_1, player_2, bet_on, odds, model_prob, result, profit, status) "
+            "VALUES (?, date('now', ?), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (i, f"-{i % 300} days", now + 60 * i, f"Tournament {i % 40}", rng.choice(['Hard', 'Clay', 'Grass']),
+             f"Player {2 * i}", f"Player {2 * i + 1}", f"Player {2 * i}", odds, rng.uniform(0.3, 0.8),
+             ('Won' if won else 'Lost') if status == 'Resolved' else None,
+             (odds - 1 if won else -1.0) if status == 'Resolved' else None, status)
+        )
+    conn.commit()
+    conn.close()
+
+async def client(http, path, n, latencies, errors):
+    for _ in range(n):
+        start = time.perf_counter()
+        try:
+            resp = await http.get(path)
+            if resp.status_code != 200: errors.append(resp.status_code)
+        except Exception as e:
+            errors.append(str(e))
+        latencies.append(time.perf_counter() - start)
+
+async def run_level(http, path, clients, per_client):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(http, path, per_client, latencies, errors) for _ in range(clients)))
+    wall = time.perf_counter() - start
+    lat = np.array(latencies) * 1000
+    return {'path': path, 'clients': clients, 'requests': len(latencies), 'errors': len(errors),
+            'rps': len(latencies) / wall, 'p50_ms': np.percentile(lat, 50), 'p99_ms': np.percentile(lat, 99)}
+
+async def run_benchmark(levels=CONCURRENCY, per_client=REQUESTS_PER_CLIENT):
+    import httpx
+    import api # Imported here: DB_URL must be set first
+    import async_db
+
+    transport = httpx.ASGITransport(app=api.app)
+    print(f"--- API LOAD TEST ({api.engine.url.render_as_string(hide_password=True)}, pool {async_db.POOL_SIZE}+{async_db.MAX_OVERFLOW}) ---")
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as http:
+        for path in ENDPOINTS:
+            await run_level(http, path, 1, 2) # Warm up the pool
+            for clients in levels:
+                results.append(await run_level(http, path, clients, per_client))
+    await api.engine.dispose()
+
+    print(f"\n{'Endpoint':<12}{'Clients':>8}{'Requests':>10}{'Errors':>8}{'Req/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for r in results:
+        print(f"{r['path']:<12}{r['clients']:>8}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.0f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+    return results
+
+if __name__ == "__main__":
+    # python bench_api.py                          -> seeded SQLite stand-in
+    # python bench_api.py --url postgresql://...   -> a local Postgres with a bets table
+    parser = argparse.ArgumentParser(description="Concurrent load test for the API's database endpoints")
+    parser.add_argument('--url', help="Database to test against (default: a seeded local SQLite file)")
+    parser.add_argument('--clients', type=int, nargs='+', default=CONCURRENCY)
+    parser.add_argument('--requests', type=int, default=REQUESTS_PER_CLIENT, help="Requests per client")
+    args = parser.parse_args()
+
+    if not args.url:
+        seed_db(BENCH_DB)
+        args.url = f"sqlite:///{BENCH_DB}"
+    os.environ["DB_URL"] = args.url
+    asyncio.run(run_benchmark(args.clients, args.requests))
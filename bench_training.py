@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+# --- CONFIGURATION ---
+ROUNDS = 200 # Boosting rounds per run (enough to compare, much quicker than 1000)
+MODES = ['in-memory', 'external-memory']
+
+def run_child(mode, rounds):
+    """Trains once in this process and prints the result as one JSON line."""
+    from sklearn.metrics import log_loss
+    import feature_store
+    import train_model_v2
+
+    _, columns = feature_store.open_store(train_model_v2.TRAIN_DIR)
+    booster, y_test, probs = train_model_v2.train(
+        columns, external_memory=(mode == 'external-memory'), num_boost_round=rounds, verbose_eval=False
+    )
+    print(json.dumps({'rounds': booster.num_boosted_rounds(), 'log_loss': float(log_loss(y_test, probs))}))
+
+def measure(mode, rounds):
+    """Runs one mode in a fresh process so its peak RSS is measured on its own."""
+    start = time.time()
+    proc = subprocess.Popen([sys.executable, __file__, '--child', mode, str(rounds)], stdout=subprocess.PIPE, text=True)
+    out = proc.stdout.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.time() - start
+    if status != 0:
+        return {'mode': mode, 'error': f"exit status {status}"}
+
+    result = json.loads(out.strip().splitlines()[-1])
+    result.update({'mode': mode, 'wall_s': wall, 'peak_rss_mb': usage.ru_maxrss / 1024})
+    return result
+
+def run_benchmark(rounds=ROUNDS):
+    print(f"--- TRAINING BENCHMARK ({rounds} rounds per mode) ---")
+    results = [measure(mode, rounds) for mode in MODES]
+
+    print(f"\n{'Mode':<18}{'Wall (s)':>10}{'Peak RSS (MB)':>16}{'Rounds':>8}{'Log Loss':>10}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['mode']:<18}  FAILED ({r['error']})")
+            continue
+        print(f"{r['mode']:<18}{r['wall_s']:>10.1f}{r['peak_rss_mb']:>16.0f}{r['rounds']:>8}{r['log_loss']:>10.4f}")
+    return results
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], int(sys.argv[3]))
+    else:
+        run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else ROUNDS)
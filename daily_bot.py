@@ -2,7 +2,7 @@ import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 import datetime
-from rapidfuzz import process, fuzz
+import name_resolver
 import predict_match  # Importing your previous script
 import time
 
@@ -76,16 +76,17 @@ def match_names_to_db(web_matches, db_players):
     The HARDEST part: Linking 'Sinner J.' (Web) to 'Jannik Sinner' (DB).
     """
     valid_matches = []
-    db_names = list(db_players.keys())
+    # Known aliases and exact names resolve instantly; the rest are only
+    # scored against players sharing their surname (see name_resolver)
+    resolver = name_resolver.NameResolver(db_players.keys())
     
-    print(f"Fuzzy matching {len(web_matches)} matches against {len(db_names)} DB players...")
+    print(f"Fuzzy matching {len(web_matches)} matches against {len(resolver.names)} DB players...")
     
-    for m in web_matches:
-        # 1. Match Player 1
-        # extractOne returns (match, score, index)
-        p1_match = process.extractOne(m['p1_web'], db_names, scorer=fuzz.token_set_ratio)
-        p2_match = process.extractOne(m['p2_web'], db_names, scorer=fuzz.token_set_ratio)
-        
+    # Both sides of the whole schedule in one batch; each entry is (match, score)
+    n = len(web_matches)
+    found = resolver.resolve_many([m['p1_web'] for m in web_matches] + [m['p2_web'] for m in web_matches], 'tennisexplorer')
+    
+    for m, p1_match, p2_match in zip(web_matches, found[:n], found[n:]):
         if p1_match[1] > CONFIDENCE_THRESHOLD and p2_match[1] > CONFIDENCE_THRESHOLD:
             valid_matches.append({
                 "p1_name": p1_match[0],
@@ -97,6 +98,7 @@ def match_names_to_db(web_matches, db_players):
         else:
             # print(f"Skipping ambiguous match: {m['p1_web']} vs {m['p2_web']}")
             pass
+    resolver.save()
             
     return valid_matches
 
@@ -122,59 +124,27 @@ def run_daily_bot():
     
     results = []
     
-    for m in clean_matches:
-        p1 = m['p1_name']
-        p2 = m['p2_name']
-        surf = m['surface']
+    # Score every identified match in one model call. The feature columns come
+    # from the model file itself, so they always match what it was trained on.
+    slate = [(m['p1_name'], m['p2_name'], m['surface']) for m in clean_matches]
+    try:
+        # A match with bad player data is skipped on its own, not the whole day
+        slate, probs = model.score_available(players, slate)
+    except Exception as e:
+        print(f"Error scoring slate: {e}")
+        slate, probs = [], []
+    
+    for (p1, p2, surf), prob_p1 in zip(slate, probs):
+        # Print cleanly
+        print(f"{p1} ({prob_p1:.1%}) vs {p2} ({1-prob_p1:.1%}) [{surf}]")
         
-        # We use a try/except block to catch any missing data issues
-        try:
-            # Reuse the logic from predict_match.py but we need to capture the output
-            # So we will essentially copy the logic or import it. 
-            # Ideally, refactor predict_match.py to return values, but for now we copy-paste the core logic here for speed.
-            
-            p1_stats = players[p1]
-            p2_stats = players[p2]
-            
-            # Prepare Data Frame (Same as predict_match.py)
-            is_carpet = 1 if surf == 'Carpet' else 0
-            is_clay = 1 if surf == 'Clay' else 0
-            is_grass = 1 if surf == 'Grass' else 0
-            is_hard = 1 if surf == 'Hard' else 0
-            
-            p1_surf_val = p1_stats.get(f"surface_{surf.lower()}", 0.5)
-            p2_surf_val = p2_stats.get(f"surface_{surf.lower()}", 0.5)
-
-            import numpy as np
-            data = {
-                'p1_elo': [p1_stats['elo']], 'p2_elo': [p2_stats['elo']],
-                'p1_form': [p1_stats['form_20']], 'p2_form': [p2_stats['form_20']],
-                'p1_momentum': [p1_stats['momentum_5']], 'p2_momentum': [p2_stats['momentum_5']],
-                'p1_serve': [p1_stats['serve']], 'p2_serve': [p2_stats['serve']],
-                'p1_return': [p1_stats['return']], 'p2_return': [p2_stats['return']],
-                'p1_comeback': [p1_stats['comeback']], 'p2_comeback': [p2_stats['comeback']],
-                'p1_exp': [np.log1p(p1_stats['matches'])], 'p2_exp': [np.log1p(p2_stats['matches'])],
-                'surface_Carpet': [is_carpet], 'surface_Clay': [is_clay],
-                'surface_Grass': [is_grass], 'surface_Hard': [is_hard]
-            }
-            
-            df = pd.DataFrame(data)
-            prob_p1 = model.predict_proba(df)[0][1]
-            
-            # Print cleanly
-            print(f"{p1} ({prob_p1:.1%}) vs {p2} ({1-prob_p1:.1%}) [{surf}]")
-            
-            results.append({
-                'Player 1': p1, 'Prob 1': prob_p1,
-                'Player 2': p2, 'Prob 2': 1-prob_p1,
-                'Surface': surf,
-                'Fair Odds 1': round(1/prob_p1, 2),
-                'Fair Odds 2': round(1/(1-prob_p1), 2)
-            })
-            
-        except Exception as e:
-            # print(f"Error predicting {p1} vs {p2}: {e}")
-            pass
+        results.append({
+            'Player 1': p1, 'Prob 1': prob_p1,
+            'Player 2': p2, 'Prob 2': 1-prob_p1,
+            'Surface': surf,
+            'Fair Odds 1': round(1/prob_p1, 2),
+            'Fair Odds 2': round(1/(1-prob_p1), 2)
+        })
             
     # 5. Save to CSV for you to bet
     if results:
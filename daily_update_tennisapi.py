@@ -148,10 +148,10 @@ def update_daily():
     # 5. TRIGGER LIVE STATE UPDATE
     print("Updating Player Ratings...")
     try:
-        import save_current_state_v4 
-        save_current_state_v4.save_state()
+        import save_current_state 
+        save_current_state.save_state()
     except ImportError:
-        print("Warning: save_current_state_v4.py not found. Player ratings not updated.")
+        print("Warning: save_current_state.py not found. Player ratings not updated.")
 
 if __name__ == "__main__":
     update_daily()
\ No newline at end of file
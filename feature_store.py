@@ -0,0 +1,99 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import shutil
+
+# --- CONFIGURATION ---
+FEATURE_DIR = "tennis_brain_features"
+SCHEMA_FILE = "schema.json"
+SCHEMA_VERSION = 1
+
+# Alphabetical, so one-hot columns come out in the same order as pd.get_dummies
+SURFACE_CATEGORIES = ['Carpet', 'Clay', 'Grass', 'Hard']
+
+# Column -> on-disk dtype. date is a day number (days since 1970-01-01) and
+# surface a SURFACE_CATEGORIES code (-1 = unknown). XGBoost trains on float32
+# anyway, so the float features lose nothing by being stored that way.
+COLUMNS = {
+    'date': 'int32',
+    'p1_elo': 'float32', 'p2_elo': 'float32',
+    'p1_form': 'float32', 'p2_form': 'float32',
+    'p1_momentum': 'float32', 'p2_momentum': 'float32',
+    'p1_serve': 'float32', 'p2_serve': 'float32',
+    'p1_return': 'float32', 'p2_return': 'float32',
+    'p1_exp': 'float32', 'p2_exp': 'float32',
+    'p1_pressure': 'float32', 'p2_pressure': 'float32',
+    'fatigue_diff': 'int16',
+    'height_diff': 'float32',
+    'p1_is_lefty': 'int8', 'p2_is_lefty': 'int8',
+    'surface': 'int8',
+    'target': 'int8'
+}
+
+class FeatureWriter:
+    """
+    Appends feature chunks (as returned by replay_core.replay) to one raw
+    binary file per column. The schema sidecar is written on close() and the
+    finished directory swapped in, so readers never see a partial store.
+    """
+    def __init__(self, path=FEATURE_DIR):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        if os.path.exists(self.tmp_path): shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+        self.files = {c: open(os.path.join(self.tmp_path, f"{c}.bin"), 'wb') for c in COLUMNS}
+        self.rows = 0
+
+    def append(self, features):
+        n = len(features['target'])
+        columns = dict(features)
+        columns['date'] = np.asarray(features['date']).astype('datetime64[D]').astype(np.int64)
+        columns['surface'] = pd.Categorical(features['surface'], categories=SURFACE_CATEGORIES).codes
+        for c, dtype in COLUMNS.items():
+            np.asarray(columns[c]).astype(dtype, copy=False).tofile(self.files[c])
+        self.rows += n
+
+    def close(self):
+        for f in self.files.values(): f.close()
+        schema = {
+            'version': SCHEMA_VERSION,
+            'rows': self.rows,
+            'columns': COLUMNS,
+            'surface_categories': SURFACE_CATEGORIES
+        }
+        with open(os.path.join(self.tmp_path, SCHEMA_FILE), 'w') as f:
+            json.dump(schema, f, indent=1)
+        if os.path.exists(self.path): shutil.rmtree(self.path)
+        os.rename(self.tmp_path, self.path)
+
+def open_store(path=FEATURE_DIR):
+    """Memory-maps every column read-only. Returns (schema, {column: array})."""
+    with open(os.path.join(path, SCHEMA_FILE), 'r') as f:
+        schema = json.load(f)
+    if schema.get('version') != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported feature store version {schema.get('version')} in {path}")
+
+    columns = {}
+    for c, dtype in schema['columns'].items():
+        if schema['rows'] == 0:
+            columns[c] = np.zeros(0, dtype=dtype)
+        else:
+            columns[c] = np.memmap(os.path.join(path, f"{c}.bin"), dtype=dtype, mode='r', shape=(schema['rows'],))
+    return schema, columns
+
+def load_frame(path=FEATURE_DIR):
+    """
+    The store as a DataFrame shaped like the old tennis_brain_features.csv:
+    'date' as datetime64 and 'surface' as a categorical of surface names.
+    """
+    schema, columns = open_store(path)
+    data = {}
+    for c, values in columns.items():
+        if c == 'date':
+            data[c] = pd.to_datetime(values.astype('datetime64[D]'))
+        elif c == 'surface':
+            data[c] = pd.Categorical.from_codes(values, categories=schema['surface_categories'])
+        else:
+            data[c] = values
+    return pd.DataFrame(data)
@@ -0,0 +1,160 @@
+import json
+import os
+import re
+import unicodedata
+import numpy as np
+from rapidfuzz import process, fuzz
+
+# --- CONFIGURATION ---
+ALIAS_FILE = "name_aliases.json" # Confirmed {source: {feed name: DB name}} mappings
+ALIAS_MIN_SCORE = 90 # Only matches at least this good become aliases (above every caller's acceptance threshold)
+
+def normalize(name):
+    """'Auger-Aliassime F.' -> 'auger aliassime f' (accents stripped, lowercased, punctuation to spaces)."""
+    s = unicodedata.normalize('NFKD', str(name))
+    s = ''.join(c for c in s if not unicodedata.combining(c)).lower()
+    return ' '.join(re.sub(r"[^\w ]+", " ", s).split())
+
+class NameResolver:
+    """
+    Links feed names (TennisAPI, TennisExplorer, Pinnacle) to players_live
+    names. In order:
+      1. the alias table (names confirmed on an earlier run), per source
+      2. an exact match after normalization
+      3. fuzzy token_set_ratio over a blocked candidate set: players sharing
+         a surname-length token with the query, narrowed by its initials
+         ('Sinner J.' -> players with a 'sinner' token and a 'j...' token).
+         Only a name with no such candidates is scored against everyone.
+    Results are memoized for the resolver's lifetime, so a repeat lookup is a
+    dict hit. Good matches are written back to the alias table by save().
+    resolve_many() does the same for a whole slate, with one multi-core
+    cdist call for every name that still needs fuzzy scoring.
+    """
+    def __init__(self, names, alias_file=ALIAS_FILE):
+        self.names = list(names)
+        self.alias_file = alias_file
+        self.normalized = [normalize(n) for n in self.names]
+        self.tokens = [n.split() for n in self.normalized]
+
+        self.exact = {}
+        self.by_token = {}
+        for i, (norm, toks) in enumerate(zip(self.normalized, self.tokens)):
+            self.exact.setdefault(norm, i)
+            for t in set(toks):
+                if len(t) > 1: self.by_token.setdefault(t, []).append(i)
+
+        self.known = set(self.names)
+        self.aliases = self.load_aliases()
+        self.memo = {}
+        self.dirty = False
+
+    def load_aliases(self):
+        if not os.path.exists(self.alias_file): return {}
+        try:
+            with open(self.alias_file, 'r') as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def save(self):
+        """Persists newly confirmed aliases (atomic write). No-op if nothing changed."""
+        if not self.dirty: return
+        tmp_path = self.alias_file + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.aliases, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.alias_file)
+        self.dirty = False
+
+    def candidates(self, query_tokens):
+        """Indices of DB names sharing a surname token, narrowed by the query's initials."""
+        found = set()
+        for t in query_tokens:
+            if len(t) > 1: found.update(self.by_token.get(t, ()))
+        initials = [t for t in query_tokens if len(t) == 1]
+        if initials and found:
+            narrowed = [i for i in found if all(any(tok.startswith(c) for tok in self.tokens[i]) for c in initials)]
+            if narrowed: return sorted(narrowed)
+        return sorted(found)
+
+    def known_result(self, name, source):
+        """(db_name, score) from the memo, alias table or exact match; None if fuzzy scoring is needed."""
+        key = (source, name)
+        if key in self.memo: return self.memo[key]
+        alias = self.aliases.get(source, {}).get(name)
+        if alias in self.known: return self.remember(name, source, (alias, 100.0))
+        query = normalize(name)
+        if query in self.exact: return self.remember(name, source, (self.names[self.exact[query]], 100.0))
+        return None
+
+    def remember(self, name, source, result):
+        if result[0] and result[1] >= ALIAS_MIN_SCORE and self.aliases.get(source, {}).get(name) != result[0]:
+            self.aliases.setdefault(source, {})[name] = result[0]
+            self.dirty = True
+        self.memo[(source, name)] = result
+        return result
+
+    def resolve(self, name, source='default'):
+        """
+        Best DB name for a feed name as (db_name, score 0-100), or (None, 0)
+        if nothing scores at all. Callers apply their own acceptance threshold.
+        """
+        result = self.known_result(name, source)
+        if result is None:
+            result = self.remember(name, source, self.fuzzy(normalize(name)))
+        return result
+
+    def fuzzy(self, query):
+        pool = self.candidates(query.split())
+        if pool:
+            match = process.extractOne(query, [self.normalized[i] for i in pool], scorer=fuzz.token_set_ratio)
+            if match: return self.names[pool[match[2]]], match[1]
+        # New or unusual name: nothing to block on, score against everyone
+        match = process.extractOne(query, self.normalized, scorer=fuzz.token_set_ratio)
+        return (self.names[match[2]], match[1]) if match else (None, 0)
+
+    def resolve_many(self, names, source='default', threshold=0):
+        """
+        resolve() for a whole slate. Every (name, block candidate) pair still
+        needing a fuzzy score goes through one cpdist call on all cores, and
+        names with an empty block through one cdist against everyone. The picks
+        are the same as resolve(): best score, first candidate on a tie.
+        Returns (db_name, score) per input name, db_name None below threshold.
+        """
+        results = [self.known_result(n, source) for n in names]
+        pending = list(dict.fromkeys(n for n, r in zip(names, results) if r is None))
+        if pending and self.names:
+            queries = [normalize(n) for n in pending]
+            pools = [self.candidates(q.split()) for q in queries]
+            best = np.zeros(len(pending), dtype=np.int64)
+            best_score = np.zeros(len(pending), dtype=np.float32)
+
+            blocked = [q for q, pool in enumerate(pools) if pool]
+            if blocked:
+                sizes = np.array([len(pools[q]) for q in blocked])
+                cand = np.concatenate([pools[q] for q in blocked])
+                scores = process.cpdist(np.repeat(np.array(queries, dtype=object)[blocked], sizes).tolist(),
+                                        [self.normalized[i] for i in cand], scorer=fuzz.token_set_ratio,
+                                        dtype=np.float32, workers=-1)
+                # Per-name max, then the first pair reaching it
+                starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+                seg_max = np.maximum.reduceat(scores, starts)
+                seg = np.repeat(np.arange(len(blocked)), sizes)
+                hits = np.flatnonzero(scores == seg_max[seg])
+                _, first = np.unique(seg[hits], return_index=True)
+                best[blocked] = cand[hits[first]]
+                best_score[blocked] = seg_max
+
+            # New or unusual names: nothing to block on, score against everyone
+            open_rows = [q for q, pool in enumerate(pools) if not pool]
+            if open_rows:
+                scores = process.cdist([queries[q] for q in open_rows], self.normalized,
+                                       scorer=fuzz.token_set_ratio, dtype=np.float32, workers=-1)
+                best[open_rows] = scores.argmax(axis=1)
+                best_score[open_rows] = scores.max(axis=1)
+
+            for n, i, score in zip(pending, best.tolist(), best_score.tolist()):
+                self.remember(n, source, (self.names[i], score) if score > 0 else (None, 0))
+            results = [self.memo[(source, n)] for n in names]
+        elif pending:
+            results = [(None, 0) if r is None else r for r in results]
+        return [r if r[0] and r[1] >= threshold else (None, r[1]) for r in results]
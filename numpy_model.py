@@ -0,0 +1,117 @@
+import numpy as np
+import json
+
+# --- CONFIGURATION ---
+BATCH_ROWS = 4096 # Rows traversed at once (bounds the rows x trees work arrays)
+
+class NumpyModel:
+    """
+    Scores a saved XGBoost binary:logistic JSON model (tennis_model*.json)
+    with plain NumPy, so the predictors don't need xgboost installed.
+
+    Every tree is flattened into shared node arrays (feature, threshold,
+    left, right, default-left, leaf value) once at load time. A batch is
+    then scored by walking all rows through all trees at once, one tree
+    level per step. Like XGBClassifier it only uses the trees up to the
+    saved best_iteration.
+    """
+    def __init__(self, path):
+        with open(path, 'r') as f:
+            learner = json.load(f)['learner']
+
+        if learner['objective']['name'] != 'binary:logistic':
+            raise ValueError(f"{path}: only binary:logistic models are supported, got {learner['objective']['name']}")
+        booster = learner['gradient_booster']
+        if booster['name'] != 'gbtree':
+            raise ValueError(f"{path}: only gbtree models are supported, got {booster['name']}")
+
+        self.feature_names = learner.get('feature_names') or None
+        self.attributes = learner.get('attributes', {})
+        self.num_features = int(learner['learner_model_param']['num_feature'])
+
+        # base_score is stored as a probability ("5E-1", or "[5E-1]" in newer files)
+        base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+        self.base_margin = np.log(base_score / (1 - base_score))
+
+        trees = booster['model']['trees']
+        per_round = int(booster['model']['gbtree_model_param'].get('num_parallel_tree', 1))
+        best = self.attributes.get('best_iteration')
+        if best is not None: trees = trees[:(int(best) + 1) * per_round]
+        self.load_trees(trees)
+
+    def load_trees(self, trees):
+        feature, threshold, left, right, default_left, leaf = [], [], [], [], [], []
+        roots, offset, depth = [], 0, 1
+        for t in trees:
+            if any(t['split_type']):
+                raise ValueError("Categorical splits are not supported")
+            n = len(t['left_children'])
+            l = np.asarray(t['left_children'], dtype=np.int64)
+            r = np.asarray(t['right_children'], dtype=np.int64)
+            is_leaf = l == -1
+            idx = np.arange(n)
+            # Leaves point at themselves, so finished rows just stay put
+            left.append(np.where(is_leaf, idx, l) + offset)
+            right.append(np.where(is_leaf, idx, r) + offset)
+            feature.append(np.where(is_leaf, 0, t['split_indices']))
+            # For a leaf, split_conditions holds the leaf value
+            cond = np.asarray(t['split_conditions'], dtype=np.float32)
+            threshold.append(cond)
+            leaf.append(np.where(is_leaf, cond, 0).astype(np.float32))
+            default_left.append(np.asarray(t['default_left'], dtype=bool))
+            roots.append(offset)
+            depth = max(depth, tree_depth(l, r))
+            offset += n
+
+        def cat(parts, dtype):
+            return np.concatenate(parts).astype(dtype, copy=False) if parts else np.zeros(0, dtype)
+        self.feature = cat(feature, np.int64)
+        self.threshold = cat(threshold, np.float32)
+        self.default_left = cat(default_left, bool)
+        self.leaf = cat(leaf, np.float32)
+        # children[go_left * num_nodes + node] = next node (one gather per level)
+        self.children = cat(right + left, np.int64)
+        self.num_nodes = offset
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.depth = depth
+
+    def predict_margin(self, X):
+        # Like xgboost, refuse a DataFrame whose columns aren't the training columns
+        if hasattr(X, 'columns') and self.feature_names and list(X.columns) != self.feature_names:
+            raise ValueError(f"Feature names mismatch: expected {self.feature_names}, got {list(X.columns)}")
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.num_features:
+            raise ValueError(f"Expected rows of {self.num_features} features, got shape {X.shape}")
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), BATCH_ROWS):
+            block = X[start:start + BATCH_ROWS]
+            flat = block.ravel()
+            row_base = (np.arange(len(block), dtype=np.int64) * self.num_features)[:, None]
+            node = np.broadcast_to(self.roots, (len(block), len(self.roots))).copy()
+            for _ in range(self.depth):
+                value = flat[row_base + self.feature[node]]
+                # NaN compares False, so missing values fall through to default_left
+                go_left = (value < self.threshold[node]) | (np.isnan(value) & self.default_left[node])
+                node = self.children[go_left * self.num_nodes + node]
+            out[start:start + BATCH_ROWS] = self.leaf[node].sum(axis=1, dtype=np.float64)
+        return out + self.base_margin
+
+    def predict(self, X):
+        """P(target = 1) per row."""
+        return 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+
+    def predict_proba(self, X):
+        """Same shape as XGBClassifier.predict_proba: columns [P(0), P(1)]."""
+        p = self.predict(X)
+        return np.column_stack([1 - p, p])
+
+def tree_depth(left, right):
+    """Number of splits on the longest root-to-leaf path."""
+    depth, level = 0, [0]
+    while True:
+        level = [c for n in level if left[n] != -1 for c in (left[n], right[n])]
+        if not level: return depth
+        depth += 1
+
+def load_model(path):
+    return NumpyModel(path)
@@ -0,0 +1,98 @@
+import base64
+import bisect
+import json
+import numpy as np
+
+# Import Helpers
+import player_search
+
+# --- CONFIGURATION ---
+MIN_MATCHES = 11 # Default /players filter: players with at least this many matches
+SORT_KEYS = ('elo', 'form', 'clutch', 'surface_hard', 'surface_clay', 'surface_grass')
+
+def player_row(name, stats):
+    """One /players entry (the API's PlayerStats shape) from a player state record."""
+    return {
+        "name": name,
+        "elo": int(stats.get('elo', 1500)),
+        "form": stats.get('form_20', 0.5),
+        "clutch": stats.get('pressure', 0.5),
+        "surface_hard": stats.get('surface_hard', 0.5),
+        "surface_clay": stats.get('surface_clay', 0.5),
+        "surface_grass": stats.get('surface_grass', 0.5)
+    }
+
+def encode_cursor(value, name):
+    return base64.urlsafe_b64encode(json.dumps([value, name]).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """(sort value, name) of the last row already returned. ValueError if malformed."""
+    try:
+        value, name = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(value), str(name)
+    except Exception:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+class PlayerIndex:
+    """
+    The /players list for one player state, built once. Every player's row
+    is serialized to JSON up front, and each sort key has its order
+    precomputed (value high to low, then name), so a page is a binary search
+    for the cursor, a vectorized min-matches filter and a byte join.
+    body is the default response (min MIN_MATCHES, by Elo) as one blob,
+    total its number of players. search answers /players/search.
+    """
+    def __init__(self, players):
+        self.rows = [player_row(name, stats) for name, stats in (players or {}).items()]
+        self.matches = np.array([stats.get('matches', 0) for stats in (players or {}).values()], dtype=np.int64)
+        self.row_bytes = [json.dumps(r, separators=(',', ':')).encode('utf-8') for r in self.rows]
+
+        # key -> (sorted [(-value, name)], row positions in that order, their match counts)
+        self.orders = {}
+        for key in SORT_KEYS:
+            keyed = sorted((-float(r[key]), r['name'], i) for i, r in enumerate(self.rows))
+            positions = np.array([i for _, _, i in keyed], dtype=np.int64)
+            self.orders[key] = ([k[:2] for k in keyed], positions, self.matches[positions])
+
+        # Same order as page('elo'), ties broken by name
+        _, positions, matches = self.orders['elo']
+        by_elo = positions[matches >= MIN_MATCHES].tolist()
+        self.body = self.join(by_elo)
+        self.total = len(by_elo)
+        # Typeahead over every player in the state, best rated first
+        self.search = player_search.PlayerSearch([r['name'] for r in self.rows], [r['elo'] for r in self.rows])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def join(self, positions):
+        return b'[' + b','.join(self.row_bytes[i] for i in positions) + b']'
+
+    def page(self, sort='elo', min_matches=MIN_MATCHES, limit=None, cursor=None):
+        """
+        (JSON body, cursor for the next page or None, total players passing
+        the filter). Raises ValueError for an unknown sort key or bad cursor.
+        """
+        if sort not in self.orders:
+            raise ValueError(f"Unknown sort '{sort}' (use one of {', '.join(SORT_KEYS)})")
+        keys, positions, matches = self.orders[sort]
+        start = 0
+        if cursor:
+            value, name = decode_cursor(cursor)
+            start = bisect.bisect_right(keys, (-value, name))
+
+        passing = matches >= min_matches
+        total = int(passing.sum())
+        hits = start + np.flatnonzero(passing[start:])
+        more = limit is not None and len(hits) > limit
+        if limit is not None: hits = hits[:limit]
+
+        next_cursor = None
+        if more:
+            last = keys[hits[-1]]
+            next_cursor = encode_cursor(-last[0], last[1])
+        return self.join(positions[hits].tolist()), next_cursor, total
+
+    def search_page(self, query, limit=player_search.SEARCH_LIMIT):
+        """JSON body of the players best matching a (partial) name."""
+        return self.join(self.search.search_rows(query, limit))
@@ -0,0 +1,112 @@
+import bisect
+import heapq
+import sys
+from rapidfuzz import process, fuzz
+
+# Import Helpers
+import player_store
+from name_resolver import normalize
+
+# --- CONFIGURATION ---
+SEARCH_LIMIT = 10 # Suggestions returned by default
+FUZZY_POOL = 300 # Most the fuzzy fallback scores (highest rated first)
+FUZZY_CUTOFF = 70 # Minimum WRatio for a fuzzy suggestion
+
+class PlayerSearch:
+    """
+    Typeahead over player names. Every word of every normalized name
+    (accents folded, lowercase) is kept in one sorted list, so the players
+    with a word starting with a prefix are one bisect range. Each query word
+    narrows the result ('jan sin' -> words starting 'jan' and 'sin'), and the
+    last one can be half typed. Names that start with the query, written
+    either first-name-first or surname-first ('sinner j'), rank above other
+    hits; then higher weight (Elo) first. A query with no prefix hit, e.g. a
+    typo, is fuzzy-scored against at most FUZZY_POOL likely candidates.
+    """
+    def __init__(self, names, weights=None):
+        self.names = list(names)
+        self.weights = list(weights) if weights is not None else [0] * len(self.names)
+        self.normalized = [normalize(n) for n in self.names]
+        self.exact = {}
+
+        self.full_forms = []
+        words = []
+        for i, norm in enumerate(self.normalized):
+            self.exact.setdefault(norm, i)
+            toks = norm.split()
+            self.full_forms.append((norm, ' '.join(toks[-1:] + toks[:-1])))
+            words.extend((t, i) for t in set(toks))
+        words.sort()
+        self.words = [w for w, _ in words]
+        self.word_rows = [i for _, i in words]
+
+    def prefix(self, p):
+        """Rows with a word starting with p."""
+        lo = bisect.bisect_left(self.words, p)
+        hi = bisect.bisect_left(self.words, p + '\uffff')
+        return set(self.word_rows[lo:hi])
+
+    def rank(self, rows, query, limit):
+        def key(i):
+            starts = any(form.startswith(query) for form in self.full_forms[i])
+            return (not starts, -self.weights[i], self.names[i])
+        return heapq.nsmallest(limit, rows, key=key)
+
+    def search_rows(self, query, limit=SEARCH_LIMIT):
+        """Row positions (into names) of the best matches for query, best first."""
+        q = normalize(query)
+        if not q: return []
+        rows = None
+        for word in q.split():
+            rows = self.prefix(word) if rows is None else rows & self.prefix(word)
+            if not rows: break
+        if rows: return self.rank(rows, q, limit)
+        return self.fuzzy(q, limit)
+
+    def fuzzy(self, q, limit):
+        # Candidates share the first two letters of a query word (typos are rarely there)
+        pool = set()
+        for word in q.split():
+            pool |= self.prefix(word[:2])
+        if not pool: pool = range(len(self.names))
+        pool = sorted(pool, key=lambda i: -self.weights[i])[:FUZZY_POOL]
+        found = process.extract(q, {i: self.normalized[i] for i in pool}, scorer=fuzz.WRatio,
+                                limit=limit, score_cutoff=FUZZY_CUTOFF)
+        return [i for _, _, i in sorted(found, key=lambda m: (-m[1], -self.weights[m[2]]))]
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Best matching names for a (partial) query."""
+        return [self.names[i] for i in self.search_rows(query, limit)]
+
+    def lookup(self, query):
+        """The one player query means (exact name, or a search with a single hit), else None."""
+        q = normalize(query)
+        if q in self.exact: return self.names[self.exact[q]]
+        hits = self.search(query, 2)
+        return hits[0] if len(hits) == 1 else None
+
+def build_search(players):
+    """PlayerSearch over a {name: stats} player state, ranked by Elo."""
+    names = list(players or {})
+    return PlayerSearch(names, [players[n]['elo'] for n in names])
+
+def pick_player(query, search):
+    """
+    The player a typed name means (exact, or the only match), for the
+    prediction prompts. Prints suggestions and returns None when unsure.
+    """
+    name = search.lookup(query)
+    if name is None:
+        hits = search.search(query, 5)
+        print(f"'{query}' not found." + (f" Did you mean: {', '.join(hits)}?" if hits else ""))
+    return name
+
+if __name__ == "__main__":
+    # python player_search.py sinn   -> names to use in predict_match / predict_god_mode
+    if len(sys.argv) < 2:
+        print("Usage: python player_search.py <part of a name>")
+        sys.exit(1)
+    players = player_store.open_players() or {}
+    search = build_search(players)
+    for name in search.search(' '.join(sys.argv[1:])):
+        print(f"{name:<32} Elo {players[name]['elo']:.0f}")
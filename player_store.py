@@ -0,0 +1,232 @@
+import numpy as np
+import json
+import os
+import sys
+from collections.abc import Mapping
+from datetime import datetime
+
+# --- CONFIGURATION ---
+SNAPSHOT_DIR = "player_state" # Versioned snapshots + manifest.json
+MANIFEST_FILE = "manifest.json"
+KEEP_SNAPSHOTS = 10 # Older snapshots are pruned (never the current or a pinned one)
+JSON_FILE = "players_live.json" # Plain export of the current snapshot
+
+# Record layout (same fields as a players_live.json entry). Rates stay float64,
+# so values read back are exactly what save_state computed.
+FIELDS = [
+    ('elo', 'f8'), ('matches', 'i4'),
+    ('form_20', 'f8'), ('momentum_5', 'f8'),
+    ('serve', 'f8'), ('return', 'f8'),
+    ('comeback', 'f8'), ('pressure', 'f8'),
+    ('fatigue', 'i4'), ('height', 'f8'), ('hand', 'i1'),
+    ('surface_hard', 'f8'), ('surface_clay', 'f8'), ('surface_grass', 'f8')
+]
+FIELD_NAMES = [f for f, _ in FIELDS]
+
+def write_store(players, path):
+    """
+    Writes {name: stats} as one fixed-width record array sorted by name
+    (UTF-8 bytes), saved as .npy so readers can memory-map it. Written to a
+    temp file and swapped in.
+    """
+    names = sorted(n.encode('utf-8') for n in players)
+    width = max((len(n) for n in names), default=1)
+    records = np.zeros(len(names), dtype=[('name', f'S{width}')] + FIELDS)
+    records['name'] = names
+    for f in FIELD_NAMES:
+        records[f] = [players[n.decode('utf-8')][f] for n in names]
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as fh:
+        np.save(fh, records)
+    os.replace(tmp_path, path)
+
+class PlayerStore(Mapping):
+    """
+    Read-only {name: stats dict} view of one snapshot file. The file is
+    memory-mapped, so opening it costs the same for 5,000 players as for 50.
+    A lookup is a binary search over the sorted name column, and only the
+    records actually read are decoded into dicts.
+    """
+    def __init__(self, path, state_id=None):
+        self.path = path
+        self.state_id = state_id
+        self.records = np.load(path, mmap_mode='r')
+        self.sorted_names = self.records['name']
+        self.decoded = None
+
+    def find(self, name):
+        """Row index of name, or -1."""
+        key = name.encode('utf-8')
+        if len(key) > self.sorted_names.dtype.itemsize: return -1
+        i = int(np.searchsorted(self.sorted_names, key))
+        return i if i < len(self.sorted_names) and self.sorted_names[i] == key else -1
+
+    def __getitem__(self, name):
+        i = self.find(name) if isinstance(name, str) else -1
+        if i < 0: raise KeyError(name)
+        rec = self.records[i]
+        return {f: rec[f].item() for f in FIELD_NAMES}
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self.find(name) >= 0
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def names(self):
+        """All names (sorted), decoded once on first use."""
+        if self.decoded is None:
+            self.decoded = [n.decode('utf-8') for n in self.sorted_names]
+        return self.decoded
+
+    def column(self, field):
+        """One stat for every player, aligned with names() (a memory-mapped view)."""
+        return self.records[field]
+
+    def to_dict(self):
+        return {name: self[name] for name in self.names()}
+
+# --- SNAPSHOTS ---
+# Each save_state run publishes an immutable players_<id>.npy. manifest.json
+# lists them (state id, replay high-water mark, build time) and names the
+# current one. Both are swapped in with os.replace, so a reader sees either
+# the old state or the new one, never a mix.
+
+def write_json(data, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp_path, path)
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not os.path.exists(path): return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def snapshot_file(state_id, snapshot_dir=SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, f"players_{state_id:06d}.npy")
+
+def current_state_id(snapshot_dir=SNAPSHOT_DIR):
+    manifest = read_manifest(snapshot_dir)
+    return manifest['current'] if manifest else None
+
+def pin_file(state_id, snapshot_dir=SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, f"pinned_{state_id:06d}")
+
+def pin(state_id, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Keeps snapshot state_id from being pruned, however old it gets. A pin is
+    a marker file next to the manifest, so a reader can set one without
+    rewriting the manifest under a running publish.
+    """
+    if not os.path.exists(snapshot_file(state_id, snapshot_dir)):
+        raise KeyError(f"No snapshot {state_id} in {snapshot_dir}")
+    open(pin_file(state_id, snapshot_dir), 'a').close()
+
+def unpin(state_id, snapshot_dir=SNAPSHOT_DIR):
+    """Lets snapshot state_id be pruned again once it falls out of the last KEEP_SNAPSHOTS."""
+    try: os.remove(pin_file(state_id, snapshot_dir))
+    except FileNotFoundError: pass
+
+def pinned_ids(snapshot_dir=SNAPSHOT_DIR):
+    if not os.path.isdir(snapshot_dir): return set()
+    return {int(f[len("pinned_"):]) for f in os.listdir(snapshot_dir)
+            if f.startswith("pinned_") and f[len("pinned_"):].isdigit()}
+
+def full_replay_needed(snapshot_dir=SNAPSHOT_DIR):
+    """True after a rollback, until the next publish: the replay checkpoint can't be trusted."""
+    manifest = read_manifest(snapshot_dir)
+    return bool(manifest and manifest.get('full_replay'))
+
+def publish(players, mark=None, rows=None, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Writes players as a new snapshot, makes it current and prunes the ones
+    older than the last KEEP_SNAPSHOTS, except pinned ones. Returns its state id.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    manifest = read_manifest(snapshot_dir) or {'current': None, 'snapshots': []}
+    state_id = max((e['id'] for e in manifest['snapshots']), default=0) + 1
+    write_store(players, snapshot_file(state_id, snapshot_dir))
+
+    manifest['snapshots'].append({
+        'id': state_id,
+        'built': datetime.now().isoformat(timespec='seconds'),
+        'mark': mark,
+        'rows': rows,
+        'players': len(players)
+    })
+    manifest['current'] = state_id
+    manifest.pop('full_replay', None)
+
+    keep = set(sorted(e['id'] for e in manifest['snapshots'])[-KEEP_SNAPSHOTS:]) | pinned_ids(snapshot_dir)
+    pruned = [e for e in manifest['snapshots'] if e['id'] not in keep]
+    manifest['snapshots'] = [e for e in manifest['snapshots'] if e['id'] in keep]
+    write_json(manifest, os.path.join(snapshot_dir, MANIFEST_FILE))
+    # Only delete once the manifest no longer points at them
+    for e in pruned:
+        try: os.remove(snapshot_file(e['id'], snapshot_dir))
+        except FileNotFoundError: pass
+    return state_id
+
+def set_current(state_id, snapshot_dir=SNAPSHOT_DIR, json_path=JSON_FILE):
+    """
+    Rolls back (or forward) to an existing snapshot and re-exports
+    players_live.json from it. The target is pinned, so later publishes
+    don't prune it while it may still be needed. The replay checkpoint still
+    holds the state being rolled away from, so the next save_current_state
+    run is flagged to replay from scratch instead of resuming from it.
+    """
+    manifest = read_manifest(snapshot_dir)
+    if not manifest or state_id not in [e['id'] for e in manifest['snapshots']]:
+        raise KeyError(f"No snapshot {state_id} in {snapshot_dir}")
+    store = PlayerStore(snapshot_file(state_id, snapshot_dir), state_id)
+    manifest['current'] = state_id
+    manifest['full_replay'] = True
+    pin(state_id, snapshot_dir)
+    write_json(manifest, os.path.join(snapshot_dir, MANIFEST_FILE))
+    write_json(store.to_dict(), json_path)
+
+def open_players(state_id=None, snapshot_dir=SNAPSHOT_DIR, json_path=JSON_FILE):
+    """
+    The live player state for readers: the current snapshot, or snapshot
+    state_id if the reader pins one. Falls back to players_live.json parsed
+    into a dict when no snapshot has been published yet. None if neither exists.
+    """
+    if state_id is None: state_id = current_state_id(snapshot_dir)
+    if state_id is not None:
+        return PlayerStore(snapshot_file(state_id, snapshot_dir), state_id)
+    if os.path.exists(json_path):
+        with open(json_path, 'r') as f:
+            return json.load(f)
+    return None
+
+def list_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    manifest = read_manifest(snapshot_dir)
+    if not manifest:
+        print("No snapshots published yet.")
+        return
+    pinned = pinned_ids(snapshot_dir)
+    print(f"{'':3}{'ID':>6}  {'Built':<20}{'Players':>8}{'Rows':>10}  Mark")
+    for e in manifest['snapshots']:
+        flag = ('*' if e['id'] == manifest['current'] else '') + ('P' if e['id'] in pinned else '')
+        mark = e['mark']['tourney_date'] if e['mark'] else '-'
+        print(f"{flag:3}{e['id']:>6}  {e['built']:<20}{e['players']:>8}{e['rows'] if e['rows'] is not None else '-':>10}  {mark}")
+
+if __name__ == "__main__":
+    # python player_store.py              -> list snapshots (* = current, P = pinned)
+    # python player_store.py rollback ID  -> make snapshot ID current again (and pin it)
+    # python player_store.py pin ID       -> never prune snapshot ID
+    # python player_store.py unpin ID     -> let snapshot ID be pruned again
+    if len(sys.argv) > 2 and sys.argv[1] == 'rollback':
+        set_current(int(sys.argv[2]))
+        print(f"Current player state is now snapshot {int(sys.argv[2])}. The next save_current_state run will replay from scratch.")
+    elif len(sys.argv) > 2 and sys.argv[1] == 'pin':
+        pin(int(sys.argv[2]))
+    elif len(sys.argv) > 2 and sys.argv[1] == 'unpin':
+        unpin(int(sys.argv[2]))
+    list_snapshots()
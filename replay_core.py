@@ -0,0 +1,355 @@
+import pandas as pd
+import numpy as np
+import re
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import date
+
+# --- CONFIGURATION ---
+ROLLING_WINDOW = 50
+CHUNK_SIZE = 50000 # Rows per streamed batch; bounds replay memory
+SURFACES = ['Hard', 'Clay', 'Grass', 'Carpet']
+
+# Replay order. rowid breaks ties between API rows (same date, no match_num).
+MATCH_QUERY = """
+    SELECT rowid AS row_id, tourney_date AS raw_date, tourney_date, match_num, winner_name, loser_name, surface, score,
+           w_svpt, w_1stWon, w_2ndWon, l_svpt, l_1stWon, l_2ndWon,
+           winner_ht, loser_ht, winner_hand, loser_hand,
+           w_bpSaved, w_bpFaced, l_bpSaved, l_bpFaced
+    FROM matches {where} ORDER BY tourney_date ASC, match_num ASC, rowid ASC
+"""
+
+# Rows strictly after the checkpoint mark, in the same order as MATCH_QUERY.
+# match_num IS :m also covers the NULL match_num of TennisAPI rows.
+AFTER_MARK = """
+    WHERE tourney_date > :d
+       OR (tourney_date = :d AND match_num > :m)
+       OR (tourney_date = :d AND :m IS NULL AND match_num IS NOT NULL)
+       OR (tourney_date = :d AND match_num IS :m AND rowid > :r)
+"""
+
+FEATURE_COLUMNS = [
+    'p1_elo', 'p2_elo', 'p1_form', 'p2_form', 'p1_momentum', 'p2_momentum',
+    'p1_serve', 'p2_serve', 'p1_return', 'p2_return', 'p1_exp', 'p2_exp',
+    'p1_pressure', 'p2_pressure', 'fatigue_diff', 'height_diff',
+    'p1_is_lefty', 'p2_is_lefty'
+]
+
+EPOCH = date(1970, 1, 1)
+
+def day_number(d):
+    """Whole days since 1970-01-01 for a date/datetime/Timestamp."""
+    if hasattr(d, 'date'): d = d.date()
+    return (d - EPOCH).days
+
+def get_elo_win_prob(elo_a, elo_b):
+    return 1 / (1 + 10 ** ((elo_b - elo_a) / 400))
+
+def update_elo(old_elo, actual_score, expected_score, k_factor=32):
+    return old_elo + k_factor * (actual_score - expected_score)
+
+def parse_first_set_loser(score_str):
+    if not isinstance(score_str, str) or 'RET' in score_str or 'W/O' in score_str: return None
+    match = re.match(r"(\d+)-(\d+)", score_str)
+    if match:
+        w, l = int(match.group(1)), int(match.group(2))
+        return 'W' if l > w else 'L'
+    return None
+
+class RollingWindow:
+    """Fixed-size ring buffer with a running sum, so the mean is an O(1) read."""
+    __slots__ = ('values', 'size', 'head', 'count', 'total')
+
+    def __init__(self, size, fill=0):
+        self.values = [fill] * size
+        self.size = size
+        self.head = 0
+        self.count = 0
+        self.total = 0
+
+    def append(self, x):
+        if self.count == self.size: self.total -= self.values[self.head]
+        else: self.count += 1
+        self.values[self.head] = x
+        self.total += x
+        self.head += 1
+        if self.head == self.size: self.head = 0
+        # Resync once per lap so float rounding cannot build up over years,
+        # and after a NaN so it stops counting once it has left the window
+        if self.head == 0 or self.total != self.total:
+            self.total = sum(self.values)
+
+    def mean(self, default):
+        return self.total / self.count if self.count else default
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Oldest to newest."""
+        start = self.head if self.count == self.size else 0
+        for k in range(self.count):
+            yield self.values[(start + k) % self.size]
+
+class PlayerState:
+    """
+    Replay state of one player. Surface W/L are indexed by SURFACES and
+    match_dates is an ascending deque of day numbers (see day_number).
+    """
+    __slots__ = ('elo', 'matches', 'wins_last_5', 'wins_last_20', 'match_dates',
+                 'surface_wins', 'surface_loss', 'serve_pts_won', 'return_pts_won',
+                 'comebacks_attempted', 'comebacks_won', 'height', 'hand',
+                 'bp_saved_total', 'bp_faced_total')
+
+    def __init__(self):
+        self.elo = 1500
+        self.matches = 0
+        self.wins_last_5 = RollingWindow(5)
+        self.wins_last_20 = RollingWindow(20)
+        self.match_dates = deque()
+        self.surface_wins = [0] * len(SURFACES)
+        self.surface_loss = [0] * len(SURFACES)
+        self.serve_pts_won = RollingWindow(ROLLING_WINDOW, 0.0)
+        self.return_pts_won = RollingWindow(ROLLING_WINDOW, 0.0)
+        self.comebacks_attempted = 0
+        self.comebacks_won = 0
+        self.height = 185
+        self.hand = 'R'
+        self.bp_saved_total = 0
+        self.bp_faced_total = 0
+
+    def add_match_date(self, day, keep_days):
+        """Records a match on `day` and forgets dates more than keep_days before it."""
+        dates = self.match_dates
+        if dates and day < dates[-1]: insort(dates, day)
+        else: dates.append(day)
+        while dates[0] < day - keep_days: dates.popleft()
+
+    def recent_matches(self, day, days=14):
+        """Matches played from `day - days` onwards (e.g. 7/14/30 day load)."""
+        return len(self.match_dates) - bisect_left(self.match_dates, day - days)
+
+    def surface_rate(self, surface):
+        k = SURFACES.index(surface)
+        played = self.surface_wins[k] + self.surface_loss[k]
+        return self.surface_wins[k] / played if played > 0 else 0.5
+
+# --- LOADING ---
+def mark_params(mark):
+    return {'d': mark['tourney_date'], 'm': mark['match_num'], 'r': mark['row_id']}
+
+def ensure_replay_index(conn):
+    """Lets SQLite stream rows in replay order instead of sorting the whole table."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_replay ON matches (tourney_date, match_num)")
+    conn.commit()
+
+def normalize_chunk(df):
+    """Fixes types of one batch of rows. Every step is per row, so any chunking gives the same result."""
+    # FIX: Handle mixed date formats (Timestamps vs Strings)
+    df['tourney_date'] = pd.to_datetime(df['tourney_date'], format='mixed', errors='coerce')
+
+    # Force numeric types (coercing errors to NaN)
+    cols_to_fix = ['w_bpSaved', 'w_bpFaced', 'l_bpSaved', 'l_bpFaced', 'w_svpt', 'l_svpt']
+    for c in cols_to_fix:
+        df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
+
+    # A batch of API rows only has NULLs here, so keep these numeric as well
+    for c in ['winner_ht', 'loser_ht', 'w_1stWon', 'w_2ndWon', 'l_1stWon', 'l_2ndWon']:
+        df[c] = pd.to_numeric(df[c], errors='coerce')
+
+    # Missing hand is None (keeps the known hand) whatever dtype pandas picked
+    for c in ['winner_hand', 'loser_hand']:
+        df[c] = df[c].astype(object).where(df[c].notna(), None)
+    return df
+
+def iter_matches(conn, mark=None, limit=None, chunk_size=CHUNK_SIZE):
+    """
+    Streams matches in replay order as normalized DataFrames of at most
+    chunk_size rows. With a mark, only rows after it; with a limit, only
+    the first `limit` rows.
+    """
+    query = MATCH_QUERY.format(where="" if mark is None else AFTER_MARK)
+    params = {} if mark is None else mark_params(mark)
+    if limit is not None:
+        query += " LIMIT :limit"
+        params['limit'] = int(limit)
+    for chunk in pd.read_sql(query, conn, params=params or None, chunksize=chunk_size):
+        yield normalize_chunk(chunk)
+
+def row_mark(row):
+    """(tourney_date, match_num, rowid) of a raw row, as SQLite stores them."""
+    match_num = row['match_num']
+    return {
+        'tourney_date': row['raw_date'],
+        'match_num': None if pd.isna(match_num) else int(match_num),
+        'row_id': int(row['row_id'])
+    }
+
+def extract_columns(df):
+    """
+    Pulls the replay inputs out of df as typed arrays. Player names are interned
+    to integer ids (index into 'names'), surfaces to SURFACES codes (-1 = other)
+    and the first set to +1 (winner lost it), -1 (loser lost it) or 0.
+    """
+    ids, names = pd.factorize(pd.concat([df['winner_name'], df['loser_name']], ignore_index=True))
+    n = len(df)
+
+    score = df['score'].where(df['score'].map(lambda s: isinstance(s, str)))
+    first_set = score.str.extract(r"^(\d+)-(\d+)")
+    first_w = pd.to_numeric(first_set[0], errors='coerce').to_numpy()
+    first_l = pd.to_numeric(first_set[1], errors='coerce').to_numpy()
+    unfinished = score.str.contains('RET', regex=False).fillna(False) | score.str.contains('W/O', regex=False).fillna(False)
+    fsl = np.where(first_l > first_w, 1, np.where(first_l <= first_w, -1, 0))
+    fsl[unfinished.to_numpy(dtype=bool)] = 0
+
+    surface_code = pd.Categorical(df['surface'], categories=SURFACES).codes
+
+    return {
+        'n': n,
+        'names': list(names),
+        'winner': ids[:n].astype(np.int32),
+        'loser': ids[n:].astype(np.int32),
+        'date': df['tourney_date'].to_numpy(),
+        'day': df['tourney_date'].to_numpy().astype('datetime64[D]').astype(np.int64),
+        'valid': df['tourney_date'].notna().to_numpy(),
+        'surface': df['surface'].to_numpy(dtype=object),
+        'surface_code': surface_code.astype(np.int8),
+        'first_set': fsl.astype(np.int8),
+        'w_ht': df['winner_ht'].to_numpy(dtype=np.float64),
+        'l_ht': df['loser_ht'].to_numpy(dtype=np.float64),
+        'w_hand': df['winner_hand'].to_numpy(dtype=object),
+        'l_hand': df['loser_hand'].to_numpy(dtype=object),
+        'w_svpt': df['w_svpt'].to_numpy(dtype=np.float64),
+        'l_svpt': df['l_svpt'].to_numpy(dtype=np.float64),
+        'w_srv_won': (df['w_1stWon'] + df['w_2ndWon']).to_numpy(dtype=np.float64),
+        'l_srv_won': (df['l_1stWon'] + df['l_2ndWon']).to_numpy(dtype=np.float64),
+        'w_bp_saved': df['w_bpSaved'].to_numpy(dtype=np.float64),
+        'w_bp_faced': df['w_bpFaced'].to_numpy(dtype=np.float64),
+        'l_bp_saved': df['l_bpSaved'].to_numpy(dtype=np.float64),
+        'l_bp_faced': df['l_bpFaced'].to_numpy(dtype=np.float64),
+    }
+
+# --- REPLAY ---
+def replay(player_stats, df, date_window=45, collect_features=False):
+    """
+    Applies the matches in df to player_stats (name -> player dict) in order.
+    date_window is how many days of match dates each player keeps.
+
+    Returns (mark, features). mark is the last row seen (None for an empty df).
+    With collect_features, features holds the pre-match training columns for
+    every row with a valid date (winner as p1), otherwise it is None.
+    """
+    if df.empty: return None, None
+    c = extract_columns(df)
+    n = c['n']
+
+    # One dict lookup per distinct name instead of one per row
+    table = []
+    for name in c['names']:
+        if name not in player_stats:
+            player_stats[name] = PlayerState()
+        table.append(player_stats[name])
+
+    if collect_features:
+        out = {col: np.zeros(n, dtype=np.float64) for col in FEATURE_COLUMNS}
+        out_cols = [out[col] for col in FEATURE_COLUMNS]
+
+    rows = zip(
+        c['valid'].tolist(), c['day'].tolist(), c['winner'].tolist(), c['loser'].tolist(),
+        c['w_ht'].tolist(), c['l_ht'].tolist(), c['w_hand'].tolist(), c['l_hand'].tolist(),
+        c['surface'].tolist(), c['surface_code'].tolist(), c['first_set'].tolist(),
+        c['w_svpt'].tolist(), c['l_svpt'].tolist(), c['w_srv_won'].tolist(), c['l_srv_won'].tolist(),
+        c['w_bp_saved'].tolist(), c['w_bp_faced'].tolist(), c['l_bp_saved'].tolist(), c['l_bp_faced'].tolist()
+    )
+
+    for i, (valid, day, w_id, l_id, w_ht, l_ht, w_hand, l_hand, surface, surface_code, fsl,
+            w_svpt, l_svpt, w_srv_won, l_srv_won, w_bp_saved, w_bp_faced, l_bp_saved, l_bp_faced) in enumerate(rows):
+
+        if not valid: continue # Skip rows with bad dates
+
+        w = table[w_id]
+        l = table[l_id]
+
+        # 1. Update Traits
+        if w_ht > 0: w.height = w_ht
+        if l_ht > 0: l.height = l_ht
+        if w_hand: w.hand = w_hand
+        if l_hand: l.hand = l_hand
+
+        # 2. Pre-match features (the model input, leakage free)
+        if collect_features:
+            w_fatigue = w.recent_matches(day, 14)
+            l_fatigue = l.recent_matches(day, 14)
+            values = (
+                w.elo, l.elo,
+                w.wins_last_20.mean(0.5), l.wins_last_20.mean(0.5),
+                w.wins_last_5.mean(0.5), l.wins_last_5.mean(0.5),
+                w.serve_pts_won.mean(0.60), l.serve_pts_won.mean(0.60),
+                w.return_pts_won.mean(0.35), l.return_pts_won.mean(0.35),
+                np.log1p(w.matches), np.log1p(l.matches),
+                0.60 if w.bp_faced_total < 10 else w.bp_saved_total / w.bp_faced_total,
+                0.60 if l.bp_faced_total < 10 else l.bp_saved_total / l.bp_faced_total,
+                w_fatigue - l_fatigue,
+                w.height - l.height,
+                1 if w.hand == 'L' else 0,
+                1 if l.hand == 'L' else 0
+            )
+            for arr, v in zip(out_cols, values): arr[i] = v
+
+        # 3. Update Elo
+        prob_w = get_elo_win_prob(w.elo, l.elo)
+        w.elo = update_elo(w.elo, 1, prob_w, 30)
+        l.elo = update_elo(l.elo, 0, (1-prob_w), 30)
+
+        # 4. Update Form
+        w.matches += 1; l.matches += 1
+        w.add_match_date(day, date_window); l.add_match_date(day, date_window)
+        w.wins_last_5.append(1); l.wins_last_5.append(0)
+        w.wins_last_20.append(1); l.wins_last_20.append(0)
+
+        # 5. Surface
+        if surface_code >= 0:
+            w.surface_wins[surface_code] += 1
+            l.surface_loss[surface_code] += 1
+
+        # 6. Update Clutch (BP stats)
+        if w_bp_faced > 0:
+            w.bp_saved_total += w_bp_saved
+            w.bp_faced_total += w_bp_faced
+        if l_bp_faced > 0:
+            l.bp_saved_total += l_bp_saved
+            l.bp_faced_total += l_bp_faced
+
+        # 7. Update Serve
+        if w_svpt > 0 and l_svpt > 0:
+            w_s = w_srv_won / w_svpt
+            l_s = l_srv_won / l_svpt
+            w.serve_pts_won.append(w_s); w.return_pts_won.append(1 - l_s)
+            l.serve_pts_won.append(l_s); l.return_pts_won.append(1 - w_s)
+
+        if fsl == 1: w.comebacks_attempted+=1; w.comebacks_won+=1
+        elif fsl == -1: l.comebacks_attempted+=1
+
+    features = None
+    if collect_features:
+        valid = c['valid']
+        features = {'date': c['date'][valid]}
+        for col in FEATURE_COLUMNS: features[col] = out[col][valid]
+        for col in ['fatigue_diff', 'p1_is_lefty', 'p2_is_lefty']:
+            features[col] = features[col].astype(np.int64)
+        features['surface'] = c['surface'][valid]
+        features['target'] = np.ones(int(valid.sum()), dtype=np.int64)
+
+    return row_mark(df.iloc[-1]), features
+
+def replay_stream(player_stats, conn, mark=None, limit=None, date_window=45):
+    """
+    Streams matches after mark (all without one) through replay() chunk by
+    chunk. Returns (new mark, rows read); the mark is unchanged if no rows.
+    """
+    rows = 0
+    for chunk in iter_matches(conn, mark, limit):
+        mark = replay(player_stats, chunk, date_window)[0] or mark
+        rows += len(chunk)
+        print(f"   Processed {rows} matches...")
+    return mark, rows
@@ -0,0 +1,162 @@
+import datetime
+import json
+import os
+import threading
+import time
+
+# Import Helpers
+import name_resolver
+import player_index
+import player_store
+import scoring
+
+# --- CONFIGURATION ---
+SNAPSHOT_DIR = player_store.SNAPSHOT_DIR
+PLAYERS_JSON_FILE = player_store.JSON_FILE # Used only if no snapshot has been published yet
+PRESSURE_FILE = "player_pressure_stats.json"
+MODEL_FILE = "tennis_model_god_mode.json"
+RELOAD_INTERVAL = 30 # Seconds between file checks in the background
+# Pin the player state to one snapshot id (e.g. while investigating a bad
+# ingest); unset = follow the manifest's current snapshot
+STATE_PIN = int(os.environ["PLAYER_STATE_PIN"]) if os.environ.get("PLAYER_STATE_PIN") else None
+
+class Resources:
+    """
+    One consistent set of loaded artifacts. Never changed after it is built;
+    a reload builds a new one and swaps it in, so a reader holding this
+    object always sees players, pressure stats and model from the same load.
+    """
+    def __init__(self, players, pressure, scorer, state_version, model_version, state_id=None):
+        self.players = players
+        self.state_id = state_id
+        self.pressure = pressure
+        self.scorer = scorer
+        self.state_version = state_version
+        self.model_version = model_version
+        self.names = list(players) if players else []
+        self.loaded_at = datetime.datetime.now()
+        self._resolver = None
+        self._player_index = None
+
+    @property
+    def resolver(self):
+        """NameResolver over this state's player names, built on first use."""
+        if self._resolver is None:
+            self._resolver = name_resolver.NameResolver(self.names)
+        return self._resolver
+
+    @property
+    def player_index(self):
+        """The API's precomputed /players list for this state, built on first use."""
+        if self._player_index is None:
+            self._player_index = player_index.PlayerIndex(self.players)
+        return self._player_index
+
+    @property
+    def version(self):
+        """Identifies this exact state + model combination (for cache keys / the API)."""
+        return f"{self.state_version}|{self.model_version}"
+
+class ResourceManager:
+    """
+    Loads the current player snapshot (or a pinned one), player_pressure_stats.json
+    and the model, then watches the snapshot manifest and the other files'
+    fingerprints (scoring.file_version). A changed artifact is
+    re-read in the background and swapped in as a whole new Resources; a read
+    that raced a writer (bad JSON, or the file changed while reading) is
+    thrown away and retried on the next check, so nobody sees a half-written file.
+    """
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR, pressure_file=PRESSURE_FILE, model_file=MODEL_FILE,
+                 interval=RELOAD_INTERVAL, log=print, players_json_file=PLAYERS_JSON_FILE, state_pin=STATE_PIN):
+        self.snapshot_dir = snapshot_dir
+        self.players_json_file = players_json_file
+        self.state_pin = state_pin
+        self.pressure_file = pressure_file
+        self.model_file = model_file
+        self.interval = interval
+        self.log = log
+        self.resources = None
+        self.lock = threading.Lock()
+        self.thread = None
+        if state_pin is not None:
+            # Keep publish from pruning the snapshot this process runs on
+            try: player_store.pin(state_pin, snapshot_dir)
+            except (OSError, KeyError) as e: log(f"Could not pin player state {state_pin}: {e}")
+        if not self.reload():
+            # Nothing usable yet: an empty set that any later good load replaces
+            self.resources = Resources(None, {}, None, None, None)
+
+    def current(self):
+        """The latest complete Resources (players is None until the player state has loaded)."""
+        return self.resources
+
+    def reload(self):
+        """Re-reads whatever changed on disk. Returns True if a new version was swapped in."""
+        with self.lock:
+            old = self.resources
+            try:
+                state_id, state_version = self.resolve_state()
+            except (OSError, ValueError) as e:
+                self.log(f"Reload skipped, will retry: {e}")
+                return False
+            model_version = scoring.file_version(self.model_file)
+            if old and state_version == old.state_version and model_version == old.model_version:
+                return False
+
+            try:
+                if old and state_version == old.state_version:
+                    players, pressure = old.players, old.pressure
+                else:
+                    players, pressure = self.load_state(state_id)
+
+                if old and model_version == old.model_version:
+                    scorer = old.scorer
+                elif os.path.exists(self.model_file):
+                    scorer = scoring.load_scorer(self.model_file)
+                else:
+                    scorer = None
+            except (OSError, ValueError) as e:
+                self.log(f"Reload skipped, will retry: {e}")
+                return False
+
+            # Anything rewritten while we were reading it may have been read torn
+            if self.resolve_state()[1] != state_version or \
+               scoring.file_version(self.model_file) != model_version:
+                self.log("Reload skipped, files changed while loading. Will retry.")
+                return False
+
+            fresh = Resources(players, pressure, scorer, state_version, model_version, state_id)
+            if old and state_version == old.state_version:
+                # Same players: keep whatever was already built over them
+                fresh._resolver, fresh._player_index = old._resolver, old._player_index
+            self.resources = fresh
+            if old: self.log(f"Reloaded resources: {len(self.resources.names)} players, version {self.resources.version}")
+            return True
+
+    def resolve_state(self):
+        """(snapshot id to load, version string for it + the pressure stats)."""
+        state_id = self.state_pin if self.state_pin is not None else player_store.current_state_id(self.snapshot_dir)
+        players_version = f"s{state_id}" if state_id is not None else scoring.file_version(self.players_json_file)
+        return state_id, f"{players_version}:{scoring.file_version(self.pressure_file)}"
+
+    def load_state(self, state_id):
+        # Snapshots are immutable and memory-mapped: cheap to open, records decoded on lookup
+        players = player_store.open_players(state_id, self.snapshot_dir, self.players_json_file)
+        pressure = {}
+        if os.path.exists(self.pressure_file):
+            with open(self.pressure_file, 'r') as f: pressure = json.load(f)
+        return players, pressure
+
+    def start(self):
+        """Starts the background watcher (once). Readers pick up new versions via current()."""
+        if self.thread: return
+        self.thread = threading.Thread(target=self.watch, name="resource-reload", daemon=True)
+        self.thread.start()
+
+    def watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.reload()
+            except Exception as e:
+                self.log(f"Reload error: {e}")
@@ -1,176 +1,195 @@
 import sqlite3
 import pandas as pd
-import numpy as np
-import json
-import re
+import os
+import pickle
+import sys
+from collections import deque
 from datetime import datetime, timedelta
 
+# Import Helpers
+import player_store
+from replay_core import AFTER_MARK, day_number, ensure_replay_index, mark_params, replay_stream
+
 # --- CONFIGURATION ---
 DB_FILE = "tennis_data.db"
 OUTPUT_FILE = "players_live.json"
-ROLLING_WINDOW = 50
+CHECKPOINT_FILE = "replay_checkpoint.pkl"
+CHECKPOINT_VERSION = 3
+DATE_WINDOW = 45 # Days of match dates kept per player (fatigue)
 
-def get_elo_win_prob(elo_a, elo_b):
-    return 1 / (1 + 10 ** ((elo_b - elo_a) / 400))
+def export_players(player_stats, now):
+    final_export = {}
+    today = day_number(now)
 
-def update_elo(old_elo, actual_score, expected_score, k_factor=32):
-    return old_elo + k_factor * (actual_score - expected_score)
+    for name, stats in player_stats.items():
+        if stats.matches < 5: continue
 
-def parse_first_set_loser(score_str):
-    if not isinstance(score_str, str) or 'RET' in score_str or 'W/O' in score_str: return None
-    match = re.match(r"(\d+)-(\d+)", score_str)
-    if match:
-        w, l = int(match.group(1)), int(match.group(2))
-        return 'W' if l > w else 'L'
-    return None
+        recent_matches = stats.recent_matches(today, 14)
 
-def save_state():
-    print("--- GENERATING LIVE STATE (FINAL FIX) ---")
-    conn = sqlite3.connect(DB_FILE)
-    
-    # 1. LOAD DATA
-    query = """
-        SELECT tourney_date, winner_name, loser_name, surface, score, 
-               w_svpt, w_1stWon, w_2ndWon, l_svpt, l_1stWon, l_2ndWon,
-               winner_ht, loser_ht, winner_hand, loser_hand,
-               w_bpSaved, w_bpFaced, l_bpSaved, l_bpFaced
-        FROM matches ORDER BY tourney_date ASC, match_num ASC
-    """
-    df = pd.read_sql(query, conn)
-    
-    # FIX: Handle mixed date formats (Timestamps vs Strings)
-    df['tourney_date'] = pd.to_datetime(df['tourney_date'], format='mixed', errors='coerce')
-    
-    # Force numeric types (coercing errors to NaN)
-    cols_to_fix = ['w_bpSaved', 'w_bpFaced', 'l_bpSaved', 'l_bpFaced', 'w_svpt', 'l_svpt']
-    for c in cols_to_fix:
-        df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
-
-    player_stats = {}
-    
-    def get_player(name):
-        if name not in player_stats:
-            player_stats[name] = {
-                'elo': 1500,
-                'matches': 0,
-                'wins_last_5': [],
-                'wins_last_20': [],
-                'match_dates': [],
-                'surface_wins': {'Hard':0, 'Clay':0, 'Grass':0, 'Carpet':0},
-                'surface_loss': {'Hard':0, 'Clay':0, 'Grass':0, 'Carpet':0},
-                'serve_pts_won': [],
-                'return_pts_won': [],
-                'comebacks_attempted': 0,
-                'comebacks_won': 0,
-                'height': 185, 'hand': 'R',
-                'bp_saved_total': 0, 'bp_faced_total': 0
-            }
-        return player_stats[name]
-
-    print(f"Replaying {len(df)} matches...")
-    
-    for _, row in df.iterrows():
-        w_name = row['winner_name']
-        l_name = row['loser_name']
-        date = row['tourney_date']
-        
-        if pd.isna(date): continue # Skip rows with bad dates
-        
-        w = get_player(w_name)
-        l = get_player(l_name)
-        
-        # 1. Update Traits
-        if row['winner_ht'] > 0: w['height'] = row['winner_ht']
-        if row['loser_ht'] > 0: l['height'] = row['loser_ht']
-        if row['winner_hand']: w['hand'] = row['winner_hand']
-        if row['loser_hand']: l['hand'] = row['loser_hand']
-        
-        # 2. Update Elo
-        prob_w = get_elo_win_prob(w['elo'], l['elo'])
-        w['elo'] = update_elo(w['elo'], 1, prob_w, 30)
-        l['elo'] = update_elo(l['elo'], 0, (1-prob_w), 30)
-        
-        # 3. Update Form
-        w['matches'] += 1; l['matches'] += 1
-        w['match_dates'].append(date); l['match_dates'].append(date)
-        w['wins_last_5'].append(1); l['wins_last_5'].append(0)
-        w['wins_last_20'].append(1); l['wins_last_20'].append(0)
-        
-        # 4. Surface
-        if row['surface'] in w['surface_wins']:
-            w['surface_wins'][row['surface']] += 1
-            l['surface_loss'][row['surface']] += 1
-
-        # 5. Update Clutch (BP stats)
-        if row['w_bpFaced'] > 0: 
-            w['bp_saved_total'] += row['w_bpSaved']
-            w['bp_faced_total'] += row['w_bpFaced']
-        if row['l_bpFaced'] > 0:
-            l['bp_saved_total'] += row['l_bpSaved']
-            l['bp_faced_total'] += row['l_bpFaced']
-
-        # 6. Update Serve
-        if row['w_svpt'] > 0 and row['l_svpt'] > 0:
-            w_s = (row['w_1stWon'] + row['w_2ndWon']) / row['w_svpt']
-            l_s = (row['l_1stWon'] + row['l_2ndWon']) / row['l_svpt']
-            w['serve_pts_won'].append(w_s); w['return_pts_won'].append(1 - l_s)
-            l['serve_pts_won'].append(l_s); l['return_pts_won'].append(1 - w_s)
-
-        # 7. Cleanup
-        for p in [w, l]:
-            if len(p['wins_last_5']) > 5: p['wins_last_5'].pop(0)
-            if len(p['wins_last_20']) > 20: p['wins_last_20'].pop(0)
-            if len(p['serve_pts_won']) > ROLLING_WINDOW: 
-                p['serve_pts_won'].pop(0); p['return_pts_won'].pop(0)
-            # Keep dates fresh
-            p['match_dates'] = [d for d in p['match_dates'] if (date - d).days <= 45]
-            
-        fsl = parse_first_set_loser(row['score'])
-        if fsl == 'W': w['comebacks_attempted']+=1; w['comebacks_won']+=1
-        elif fsl == 'L': l['comebacks_attempted']+=1
-
-    # --- FINAL EXPORT ---
-    print("Finalizing live stats...")
-    final_export = {}
-    now = datetime.now()
-    
-    for name, stats in player_stats.items():
-        if stats['matches'] < 5: continue
-        
-        recent_matches = sum(1 for d in stats['match_dates'] if (now - d).days <= 14)
-        
-        if stats['bp_faced_total'] > 10:
-            clutch = stats['bp_saved_total'] / stats['bp_faced_total']
+        if stats.bp_faced_total > 10:
+            clutch = stats.bp_saved_total / stats.bp_faced_total
         else:
             clutch = 0.60
-        
-        s_avg = np.mean(stats['serve_pts_won']) if stats['serve_pts_won'] else 0.60
-        r_avg = np.mean(stats['return_pts_won']) if stats['return_pts_won'] else 0.35
-        
+
         final_export[name] = {
-            'elo': stats['elo'],
-            'matches': stats['matches'],
-            'form_20': np.mean(stats['wins_last_20']) if stats['wins_last_20'] else 0.5,
-            'momentum_5': np.mean(stats['wins_last_5']) if stats['wins_last_5'] else 0.5,
-            'serve': float(s_avg),
-            'return': float(r_avg),
-            'comeback': stats['comebacks_won']/stats['comebacks_attempted'] if stats['comebacks_attempted']>0 else 0.0,
+            'elo': stats.elo,
+            'matches': stats.matches,
+            'form_20': stats.wins_last_20.mean(0.5),
+            'momentum_5': stats.wins_last_5.mean(0.5),
+            'serve': float(stats.serve_pts_won.mean(0.60)),
+            'return': float(stats.return_pts_won.mean(0.35)),
+            'comeback': stats.comebacks_won/stats.comebacks_attempted if stats.comebacks_attempted>0 else 0.0,
             'pressure': clutch,
             'fatigue': recent_matches,
-            'height': stats['height'],
-            'hand': 1 if stats['hand'] == 'L' else 0,
-            'surface_hard': stats['surface_wins']['Hard'] / (stats['surface_wins']['Hard'] + stats['surface_loss']['Hard']) if (stats['surface_wins']['Hard'] + stats['surface_loss']['Hard']) > 0 else 0.5,
-            'surface_clay': stats['surface_wins']['Clay'] / (stats['surface_wins']['Clay'] + stats['surface_loss']['Clay']) if (stats['surface_wins']['Clay'] + stats['surface_loss']['Clay']) > 0 else 0.5,
-            'surface_grass': stats['surface_wins']['Grass'] / (stats['surface_wins']['Grass'] + stats['surface_loss']['Grass']) if (stats['surface_wins']['Grass'] + stats['surface_loss']['Grass']) > 0 else 0.5
+            'height': stats.height,
+            'hand': 1 if stats.hand == 'L' else 0,
+            'surface_hard': stats.surface_rate('Hard'),
+            'surface_clay': stats.surface_rate('Clay'),
+            'surface_grass': stats.surface_rate('Grass')
         }
+    return final_export
+
+# --- CHECKPOINTS ---
+def save_checkpoint(player_stats, mark, rows, path=CHECKPOINT_FILE):
+    checkpoint = {
+        'version': CHECKPOINT_VERSION,
+        'mark': mark,
+        'rows': rows,
+        'built': datetime.now().isoformat(timespec='seconds'),
+        'players': player_stats
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    if not os.path.exists(path): return None
+    try:
+        with open(path, 'rb') as f:
+            checkpoint = pickle.load(f)
+    except Exception as e:
+        print(f"Warning: could not read checkpoint ({e}).")
+        return None
+    if checkpoint.get('version') != CHECKPOINT_VERSION: return None
+    return checkpoint
+
+def count_rows(conn, mark=None):
+    """Rows up to and including the mark (all rows without one)."""
+    if mark is None:
+        return conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+    total = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+    after = conn.execute("SELECT COUNT(*) FROM matches " + AFTER_MARK, mark_params(mark)).fetchone()[0]
+    return total - after
+
+def write_live_file(player_stats, mark=None, rows=None):
+    """
+    Publishes the state as a new versioned snapshot (what the API, tracker and
+    predictors read) and refreshes the players_live.json export. Both writes
+    are atomic, so a reader never sees a half-written file.
+    """
+    print("Finalizing live stats...")
+    final_export = export_players(player_stats, datetime.now())
+
+    state_id = player_store.publish(final_export, mark, rows)
+    player_store.write_json(final_export, OUTPUT_FILE)
+
+    print(f"SUCCESS: Saved live profile for {len(final_export)} players (snapshot {state_id}).")
 
-    with open(OUTPUT_FILE, 'w') as f:
-        json.dump(final_export, f)
-        
-    print(f"SUCCESS: Saved live profile for {len(final_export)} players.")
-    
     if "Jannik Sinner" in final_export:
         print(f"VERIFY Sinner Pressure: {final_export['Jannik Sinner']['pressure']:.1%}")
 
+def save_state(full=False):
+    """
+    Rebuilds the live player state (snapshot + players_live.json). Resumes
+    from the replay checkpoint when the matches before its mark are
+    untouched and no snapshot rollback happened since, otherwise replays
+    from 2000.
+    """
+    if not full and player_store.full_replay_needed():
+        # The checkpoint holds the state that was rolled back
+        print("Player state was rolled back since the last run. Doing a full replay.")
+        full = True
+
+    conn = sqlite3.connect(DB_FILE)
+    ensure_replay_index(conn)
+    checkpoint = None if full else load_checkpoint()
+
+    # A backfill into already-replayed dates moves the row count under the mark
+    if checkpoint and count_rows(conn, checkpoint['mark']) != checkpoint['rows']:
+        print("Checkpoint is stale (history changed under it). Falling back to full replay.")
+        checkpoint = None
+
+    if checkpoint:
+        print(f"--- UPDATING LIVE STATE (FROM CHECKPOINT {checkpoint['mark']['tourney_date']}) ---")
+        player_stats = checkpoint['players']
+        mark, new_rows = replay_stream(player_stats, conn, checkpoint['mark'], date_window=DATE_WINDOW)
+        print(f"Applied {new_rows} new matches.")
+        rows = checkpoint['rows'] + new_rows
+    else:
+        print("--- GENERATING LIVE STATE (FULL REPLAY) ---")
+        player_stats = {}
+        mark, rows = replay_stream(player_stats, conn, date_window=DATE_WINDOW)
+        print(f"Replayed {rows} matches.")
+    conn.close()
+
+    if mark is not None:
+        save_checkpoint(player_stats, mark, rows)
+    write_live_file(player_stats, mark, rows)
+
+def same_value(a, b):
+    """Deep equality that treats NaN (e.g. unknown hand) as equal to itself."""
+    if hasattr(a, '__slots__'):
+        return type(a) is type(b) and all(same_value(getattr(a, k), getattr(b, k)) for k in a.__slots__)
+    if isinstance(a, dict):
+        return isinstance(b, dict) and a.keys() == b.keys() and all(same_value(a[k], b[k]) for k in a)
+    if isinstance(a, (list, deque)):
+        return type(a) is type(b) and len(a) == len(b) and all(same_value(x, y) for x, y in zip(a, b))
+    return a == b or (pd.isna(a) and pd.isna(b))
+
+def verify_incremental(holdout=1000):
+    """
+    Proves the checkpoint path matches a full replay: replays everything except
+    the last `holdout` rows, round-trips a checkpoint through disk, applies the
+    rest via the incremental query and compares both states field by field.
+    """
+    print(f"--- VERIFYING INCREMENTAL REPLAY (HOLDOUT {holdout}) ---")
+    conn = sqlite3.connect(DB_FILE)
+    ensure_replay_index(conn)
+    total = count_rows(conn)
+    cut = max(total - holdout, 1)
+
+    full_stats = {}
+    replay_stream(full_stats, conn, date_window=DATE_WINDOW)
+
+    head_stats = {}
+    mark, _ = replay_stream(head_stats, conn, limit=cut, date_window=DATE_WINDOW)
+    verify_file = CHECKPOINT_FILE + ".verify"
+    save_checkpoint(head_stats, mark, cut, path=verify_file)
+    checkpoint = load_checkpoint(verify_file)
+    os.remove(verify_file)
+
+    if count_rows(conn, checkpoint['mark']) != checkpoint['rows']:
+        print("FAILED: row count under the mark does not match the checkpoint.")
+        return False
+
+    inc_stats = checkpoint['players']
+    _, tail_rows = replay_stream(inc_stats, conn, checkpoint['mark'], date_window=DATE_WINDOW)
+    conn.close()
+
+    mismatches = [name for name in full_stats if not same_value(full_stats[name], inc_stats.get(name))]
+    mismatches += [name for name in inc_stats if name not in full_stats]
+    if tail_rows != total - cut:
+        print(f"FAILED: incremental query returned {tail_rows} rows, expected {total - cut}.")
+        return False
+    if mismatches:
+        print(f"FAILED: {len(mismatches)} players differ (e.g. {mismatches[:5]}).")
+        return False
+
+    print(f"OK: {len(full_stats)} players identical after {tail_rows} incremental matches.")
+    return True
+
 if __name__ == "__main__":
-    save_state()
\ No newline at end of file
+    if "--verify" in sys.argv:
+        sys.exit(0 if verify_incremental() else 1)
+    save_state(full="--full" in sys.argv)
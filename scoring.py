@@ -0,0 +1,217 @@
+import numpy as np
+import os
+import threading
+from collections import OrderedDict
+
+# Import Helpers
+import numpy_model
+
+# --- CONFIGURATION ---
+DEFAULT_HEIGHT = 185
+DEFAULT_PRESSURE = 0.60
+PREDICTION_CACHE_SIZE = 50000 # Matchups kept by PredictionCache (LRU)
+
+# Per-player feature -> value from a players_live.json record.
+# 'pressure' is special-cased: player_pressure_stats.json wins when given.
+PLAYER_FEATURES = {
+    'elo': lambda p: p['elo'],
+    'form': lambda p: p['form_20'],
+    'momentum': lambda p: p['momentum_5'],
+    'serve': lambda p: p['serve'],
+    'return': lambda p: p['return'],
+    'comeback': lambda p: p['comeback'],
+    'exp': lambda p: np.log1p(p['matches']),
+    'is_lefty': lambda p: p.get('hand', 0)
+}
+
+DIFF_FEATURES = {
+    'fatigue_diff': lambda p1, p2: p1.get('fatigue', 0) - p2.get('fatigue', 0),
+    'height_diff': lambda p1, p2: p1.get('height', DEFAULT_HEIGHT) - p2.get('height', DEFAULT_HEIGHT)
+}
+
+def file_version(*paths):
+    """
+    Cheap fingerprint of one or more files (mtime + size, '-' if missing).
+    Changes whenever any of them is rewritten, so it can key caches.
+    """
+    parts = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_mtime_ns:x}.{st.st_size:x}")
+        except FileNotFoundError:
+            parts.append('-')
+    return ':'.join(parts)
+
+def model_columns(model):
+    """
+    Feature names in the order the model was trained on (NumpyModel or
+    XGBClassifier). A model saved without them can't be scored safely, since
+    its column order would only be a guess, so that is a load-time error.
+    """
+    names = getattr(model, 'feature_names', None)
+    if names is None and hasattr(model, 'get_booster'): names = model.get_booster().feature_names
+    if not names:
+        raise ValueError("Model file has no feature names; retrain it with train_model_v2.py so they are saved")
+    return list(names)
+
+class FeatureVector:
+    """
+    Compiles a model's column list into index plans, once. Every column must
+    map to a players_live.json field, a P1-P2 difference or a surface flag;
+    anything else (or a duplicate) is an error here, not a wrong prediction later.
+    fill() then writes a match straight into a float32 row by index.
+    """
+    def __init__(self, columns):
+        self.columns = list(columns)
+        if len(set(self.columns)) != len(self.columns):
+            raise ValueError(f"Duplicate feature names in model: {self.columns}")
+
+        self.player = ([], []) # Per side: (column index, getter)
+        self.pressure = [None, None] # Column index of p1_/p2_pressure
+        self.diffs = [] # (column index, getter)
+        self.surfaces = {} # Surface name -> column index
+        for j, col in enumerate(self.columns):
+            side = {'p1_': 0, 'p2_': 1}.get(col[:3])
+            if side is not None and col[3:] == 'pressure':
+                self.pressure[side] = j
+            elif side is not None and col[3:] in PLAYER_FEATURES:
+                self.player[side].append((j, PLAYER_FEATURES[col[3:]]))
+            elif col in DIFF_FEATURES:
+                self.diffs.append((j, DIFF_FEATURES[col]))
+            elif col.startswith('surface_'):
+                self.surfaces[col[len('surface_'):]] = j
+            else:
+                raise ValueError(f"Model feature '{col}' has no source in players_live.json")
+        self.surface_index = list(self.surfaces.values())
+        self.row = np.zeros(len(self.columns), dtype=np.float32)
+
+    def fill(self, row, p1_name, p1, p2_name, p2, surface, pressure_stats):
+        for side, (name, p) in enumerate(((p1_name, p1), (p2_name, p2))):
+            for j, get in self.player[side]:
+                row[j] = get(p)
+            if self.pressure[side] is not None:
+                row[self.pressure[side]] = pressure_stats.get(name, p.get('pressure', DEFAULT_PRESSURE))
+        for j, get in self.diffs:
+            row[j] = get(p1, p2)
+        row[self.surface_index] = 0
+        if surface in self.surfaces: row[self.surfaces[surface]] = 1
+        return row
+
+    def matrix(self, players, slate, pressure_stats=None):
+        """One row per (p1, p2, surface) in slate; p1/p2 are players_live keys."""
+        pressure_stats = pressure_stats or {}
+        X = np.empty((len(slate), len(self.columns)), dtype=np.float32)
+        for i, (p1_name, p2_name, surface) in enumerate(slate):
+            self.fill(X[i], p1_name, players[p1_name], p2_name, players[p2_name], surface, pressure_stats)
+        return X
+
+class Scorer:
+    """A model together with its compiled feature vector. version identifies the loaded model file."""
+    def __init__(self, model, version=None):
+        self.model = model
+        self.version = version
+        self.features = FeatureVector(model_columns(model))
+        expected = getattr(model, 'num_features', len(self.features.columns))
+        if expected != len(self.features.columns):
+            raise ValueError(f"Model expects {expected} features but has {len(self.features.columns)} names")
+
+    @property
+    def columns(self):
+        return self.features.columns
+
+    def score_slate(self, players, slate, pressure_stats=None):
+        """
+        P1 win probabilities for a whole slate of (p1, p2, surface) tuples, with
+        a single predict call. The result is aligned with slate.
+        """
+        if not slate: return np.empty(0, dtype=np.float32)
+        return self.model.predict_proba(self.features.matrix(players, slate, pressure_stats))[:, 1]
+
+    def score_available(self, players, slate, pressure_stats=None, log=print):
+        """
+        Like score_slate, but a match whose features can't be built (a player
+        record missing a stat, say) is logged and left out instead of failing
+        the whole slate. Returns (the matches scored, their probabilities).
+        """
+        pressure_stats = pressure_stats or {}
+        X = np.empty((len(slate), len(self.features.columns)), dtype=np.float32)
+        kept = []
+        for p1_name, p2_name, surface in slate:
+            try:
+                self.features.fill(X[len(kept)], p1_name, players[p1_name], p2_name, players[p2_name], surface, pressure_stats)
+            except Exception as e:
+                log(f"Skipping {p1_name} vs {p2_name}: {e}")
+                continue
+            kept.append((p1_name, p2_name, surface))
+        if not kept: return [], np.empty(0, dtype=np.float32)
+        return kept, self.model.predict_proba(X[:len(kept)])[:, 1]
+
+    def explain_slate(self, players, slate, pressure_stats=None):
+        """score_slate plus the feature rows it scored: (probabilities, float32 matrix in columns order)."""
+        X = self.features.matrix(players, slate, pressure_stats)
+        if not slate: return np.empty(0, dtype=np.float32), X
+        return self.model.predict_proba(X)[:, 1], X
+
+    def predict(self, p1_name, p2_name, surface, players, pressure_stats=None):
+        """P1 win probability for one match, built in the scorer's reusable row."""
+        row = self.features.fill(self.features.row, p1_name, players[p1_name], p2_name, players[p2_name], surface, pressure_stats or {})
+        return float(self.model.predict_proba(row[None, :])[0, 1])
+
+def load_scorer(path):
+    """Loads a saved model file (without xgboost) and binds it to its feature schema."""
+    version = file_version(path)
+    return Scorer(numpy_model.load_model(path), version)
+
+class PredictionCache:
+    """
+    Memoized P1 win probabilities keyed by (p1, p2, surface, state version,
+    model version), with LRU eviction. Entries for an older state or model
+    can never match again, so the cache empties itself when either changes.
+    Thread-safe, so the API's worker threads can share one instance.
+    """
+    def __init__(self, maxsize=PREDICTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.versions = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def score_slate(self, scorer, players, slate, state_version, pressure_stats=None):
+        """Like Scorer.score_slate, but only matchups not seen before are scored (in one call)."""
+        versions = (state_version, scorer.version)
+        keys = [(p1, p2, surface) + versions for p1, p2, surface in slate]
+        probs = np.empty(len(slate), dtype=np.float64)
+        missing = []
+        with self.lock:
+            if versions != self.versions:
+                self.entries.clear()
+                self.versions = versions
+            for i, key in enumerate(keys):
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    probs[i] = self.entries[key]
+                else:
+                    missing.append(i)
+            self.hits += len(slate) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            probs[missing] = scorer.score_slate(players, [slate[i] for i in missing], pressure_stats)
+            with self.lock:
+                if versions == self.versions:
+                    for i in missing:
+                        self.entries[keys[i]] = float(probs[i])
+                        self.entries.move_to_end(keys[i])
+                    while len(self.entries) > self.maxsize:
+                        self.entries.popitem(last=False)
+        return probs
+
+    def predict(self, scorer, p1_name, p2_name, surface, players, state_version, pressure_stats=None):
+        return float(self.score_slate(scorer, players, [(p1_name, p2_name, surface)], state_version, pressure_stats)[0])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.versions = None
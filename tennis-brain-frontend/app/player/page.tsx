@@ -12,29 +12,37 @@ interface Player {
   surface_grass: number;
 }
 
+const API_URL = "http://127.0.0.1:8000";
+const PAGE_SIZE = 50;
+const SEARCH_DELAY_MS = 200; // Wait for a pause in typing before asking the API
+
 export default function PlayersPage() {
   const [players, setPlayers] = useState<Player[]>([]);
   const [filtered, setFiltered] = useState<Player[]>([]); // Initialize as empty array
   const [search, setSearch] = useState("");
   const [loading, setLoading] = useState(true);
+  const [total, setTotal] = useState(0);
+  const [cursor, setCursor] = useState<string | null>(null);
 
-  useEffect(() => {
-    fetch("http://127.0.0.1:8000/players")
+  // The API sorts and pages; we only fetch the next PAGE_SIZE players by Elo
+  const loadPage = (after: string | null) => {
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (after) params.set("cursor", after);
+    return fetch(`${API_URL}/players?${params}`)
       .then((res) => {
         if (!res.ok) {
             throw new Error(`API error: ${res.status}`);
         }
+        setTotal(Number(res.headers.get("X-Total-Count") ?? 0));
+        setCursor(res.headers.get("X-Next-Cursor"));
         return res.json();
       })
       .then((data) => {
         // Safety check: Ensure data is actually an array
         if (Array.isArray(data)) {
-            setPlayers(data);
-            setFiltered(data);
+            setPlayers((prev) => (after ? [...prev, ...data] : data));
         } else {
             console.error("API returned non-array data:", data);
-            setPlayers([]);
-            setFiltered([]);
         }
         setLoading(false);
       })
@@ -43,16 +51,42 @@ export default function PlayersPage() {
           setLoading(false);
           // Optional: set an error state here to show a message to the user
       });
+  };
+
+  useEffect(() => {
+    loadPage(null);
   }, []);
 
-  // Filter logic
+  // Filter logic: loaded rows match instantly, then the API searches every player
   useEffect(() => {
     if (!Array.isArray(players)) return; // Extra safety
     
+    const query = search.trim();
     const results = players.filter(p => 
-      p.name.toLowerCase().includes(search.toLowerCase())
+      p.name.toLowerCase().includes(query.toLowerCase())
     );
     setFiltered(results);
+    if (!query) return;
+
+    let cancelled = false; // A newer keystroke wins over a slower earlier reply
+    const timer = setTimeout(() => {
+      const params = new URLSearchParams({ q: query, limit: String(PAGE_SIZE) });
+      fetch(`${API_URL}/players/search?${params}`)
+        .then((res) => {
+          if (!res.ok) {
+              throw new Error(`API error: ${res.status}`);
+          }
+          return res.json();
+        })
+        .then((data) => {
+          if (!cancelled && Array.isArray(data)) setFiltered(data);
+        })
+        .catch((err) => console.error("Search failed:", err));
+    }, SEARCH_DELAY_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
   }, [search, players]);
 
   return (
@@ -61,7 +95,7 @@ export default function PlayersPage() {
       <div className="flex justify-between items-center">
         <div>
           <h1 className="text-3xl font-bold text-white mb-2">Player Database</h1>
-          <p className="text-gray-400">Live ratings for {players.length} active players.</p>
+          <p className="text-gray-400">Live ratings for {total || players.length} active players.</p>
         </div>
         
         {/* Search Bar */}
@@ -81,7 +115,7 @@ export default function PlayersPage() {
       ) : (
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">
           {/* Use optional chaining just in case */}
-          {filtered?.slice(0, 50).map((player) => (
+          {filtered?.map((player) => (
             <div key={player.name} className="bg-gray-900/50 border border-gray-800 p-5 rounded-xl hover:border-gray-700 transition group">
               <div className="flex justify-between items-start mb-4">
                 <div>
@@ -107,6 +141,14 @@ export default function PlayersPage() {
                   No players found.
               </div>
           )}
+          {cursor && !search.trim() && (
+              <button
+                onClick={() => loadPage(cursor)}
+                className="col-span-full bg-gray-900 border border-gray-800 rounded-lg py-2 text-sm text-gray-400 hover:border-green-500 hover:text-white transition"
+              >
+                  Load more players
+              </button>
+          )}
         </div>
       )}
     </main>
@@ -1,87 +1,144 @@
-import pandas as pd
 import xgboost as xgb
+import numpy as np
+import os
+import sys
 from sklearn.metrics import accuracy_score, log_loss
 
+# Import Helpers
+import feature_store
+import training_data
+
 # --- CONFIGURATION ---
-TRAIN_FILE = "tennis_brain_features.csv"
+TRAIN_DIR = feature_store.FEATURE_DIR
 MODEL_FILE = "tennis_model_god_mode.json"
+SPLIT_DATE = '2024-01-01'
+MODEL_VERSIONS_DIR = "model_versions" # Every published model is also kept here as <name>.v<N>.json
 
-def train_final():
-    print("--- TRAINING FINAL MODEL (NO LEAKAGE) ---")
-    
-    # 1. Load Data
-    df = pd.read_csv(TRAIN_FILE)
+PARAMS = {
+    'learning_rate': 0.05,
+    'max_depth': 4,
+    'objective': 'binary:logistic',
+    'tree_method': 'hist',
+    'nthread': -1
+}
+N_ESTIMATORS = 1000
+EARLY_STOPPING_ROUNDS = 50
+
+# Refresh (warm start)
+REFRESH_ROUNDS = 100 # Trees added per refresh
+REFRESH_VALID_DAYS = 60 # Most recent days held out to accept/reject the refresh
+
+def train(columns, external_memory=False, num_boost_round=N_ESTIMATORS, verbose_eval=100):
+    """Trains on rows before SPLIT_DATE, early-stops on the rest. Returns (booster, y_test, probs)."""
+    # Split by date (row masks, the store is already chronological)
+    train_rows, test_rows = training_data.split_rows(columns, SPLIT_DATE)
     
-    # 2. Augment Data (Mirror Flip)
+    # Augment Data (Mirror Flip)
+    # The mirrored rows (P1/P2 swapped, diffs negated, target 0) are built
+    # batch by batch from the same column buffers while XGBoost reads them.
     print("Augmenting data...")
-    df_loser = df.copy()
-    
-    # Identify P1 columns automatically
-    p1_cols = [c for c in df.columns if c.startswith('p1_')]
-    p2_cols = [c.replace('p1_', 'p2_') for c in p1_cols]
-    
-    # Swap columns
-    rename_dict = {}
-    for p1, p2 in zip(p1_cols, p2_cols):
-        rename_dict[p1] = p2
-        rename_dict[p2] = p1
-        
-    df_loser = df_loser.rename(columns=rename_dict)
-    
-    # Flip the Target and the Diff stats
-    df_loser['target'] = 0
-    df_loser['fatigue_diff'] = -df_loser['fatigue_diff'] 
-    df_loser['height_diff'] = -df_loser['height_diff']
-    
-    # Combine
-    full_df = pd.concat([df, df_loser], ignore_index=True)
-    full_df['date'] = pd.to_datetime(full_df['date'])
-    full_df = full_df.sort_values('date')
-    
-    # 3. Prepare for Training
-    # FIX: We only drop 'date' and 'target'. 
-    # (p1_name and p2_name are essentially already gone, so we don't try to drop them)
-    features = full_df.drop(columns=['date', 'target'])
-    target = full_df['target']
-    
-    # One-Hot Encode Surface
-    features = pd.get_dummies(features, columns=['surface'])
-    
-    # 4. Split
-    split_date = '2024-01-01'
-    mask_train = full_df['date'] < split_date
-    mask_test = full_df['date'] >= split_date
-    
-    X_train = features[mask_train]
-    y_train = target[mask_train]
-    X_test = features[mask_test]
-    y_test = target[mask_test]
-    
-    print(f"Training on {len(X_train)} rows...")
+    dtrain, _ = training_data.build_matrix(columns, train_rows, external_memory=external_memory, name="train")
+    dtest, y_test = training_data.build_matrix(columns, test_rows, ref=dtrain, external_memory=external_memory, name="test")
     
-    # 5. Train
-    model = xgb.XGBClassifier(
-        n_estimators=1000,
-        learning_rate=0.05,
-        max_depth=4,
-        objective='binary:logistic',
-        early_stopping_rounds=50,
-        n_jobs=-1
+    print(f"Training on {dtrain.num_row()} rows...")
+    booster = xgb.train(
+        PARAMS, dtrain,
+        num_boost_round=num_boost_round,
+        evals=[(dtest, 'validation_0')],
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        verbose_eval=verbose_eval
     )
+    return booster, y_test, training_data.predict_best(booster, dtest)
+
+def current_version(path=MODEL_FILE):
+    if not os.path.exists(path): return 0
+    return int(xgb.Booster(model_file=path).attr('model_version') or 0)
+
+def publish(booster, train_cutoff):
+    """
+    Stamps the model with its version and training cutoff, keeps a copy in
+    MODEL_VERSIONS_DIR and swaps it in as MODEL_FILE.
+    """
+    version = current_version() + 1
+    booster.set_attr(model_version=str(version), train_cutoff=str(train_cutoff))
+    os.makedirs(MODEL_VERSIONS_DIR, exist_ok=True)
+    root, ext = os.path.splitext(os.path.basename(MODEL_FILE))
+    training_data.save_booster(booster, os.path.join(MODEL_VERSIONS_DIR, f"{root}.v{version}{ext}"))
+    training_data.save_booster(booster, MODEL_FILE)
+    return version
+
+def refresh():
+    """
+    Warm start: continues boosting the current model on the matches since its
+    recorded training cutoff, instead of rebuilding 1000 trees from scratch.
+    The newest REFRESH_VALID_DAYS are held out, and the refreshed model is only
+    published if its log loss there is no worse than the current model's.
+    Returns the new version, or None if nothing was published.
+    """
+    print("--- REFRESHING MODEL (WARM START) ---")
+    booster = xgb.Booster(model_file=MODEL_FILE)
+    # Models trained before cutoffs were recorded were all trained on SPLIT_DATE
+    cutoff = booster.attr('train_cutoff') or SPLIT_DATE
+    version = int(booster.attr('model_version') or 0)
+
+    _, columns = feature_store.open_store(TRAIN_DIR)
+    dates = np.asarray(columns['date'])
+    if len(dates) == 0:
+        print("Feature store is empty. Nothing to refresh.")
+        return None
+    valid_start = int(dates[-1]) + 1 - REFRESH_VALID_DAYS
+    new_rows = training_data.rows_between(columns, cutoff, valid_start)
+    valid_rows = training_data.rows_between(columns, valid_start, None)
+    print(f"Model v{version}, trained up to {cutoff}: {len(new_rows)} new matches, {len(valid_rows)} held out")
+    if len(new_rows) == 0:
+        print("No new matches since the last cutoff. Nothing to refresh.")
+        return None
+
+    # Continue from the trees the current model actually predicts with
+    best = booster.attr('best_iteration')
+    if best is not None: booster = booster[:int(best) + 1]
+
+    dnew, _ = training_data.dense_matrix(columns, new_rows)
+    dvalid, y_valid = training_data.dense_matrix(columns, valid_rows)
+    old_loss = log_loss(y_valid, booster.predict(dvalid), labels=[0, 1])
+
+    refreshed = xgb.train(PARAMS, dnew, num_boost_round=REFRESH_ROUNDS, xgb_model=booster, verbose_eval=False)
+    # Every tree counts now; a stale best_iteration would make predictors ignore the new ones
+    refreshed.set_attr(best_iteration=None, best_score=None)
+    probs = refreshed.predict(dvalid)
+    new_loss = log_loss(y_valid, probs, labels=[0, 1])
+
+    print(f"Held-out Log Loss: {old_loss:.4f} (v{version}) -> {new_loss:.4f} (refreshed)")
+    print(f"Held-out Accuracy: {accuracy_score(y_valid, probs > 0.5):.2%}")
+    if new_loss > old_loss:
+        print("Refresh rejected: log loss regressed. Keeping the current model.")
+        return None
+
+    new_cutoff = np.datetime64(valid_start, 'D')
+    new_version = publish(refreshed, new_cutoff)
+    print(f"Model v{new_version} saved to {MODEL_FILE} (trained up to {new_cutoff})")
+    return new_version
+
+def train_final(external_memory=False):
+    print("--- TRAINING FINAL MODEL (NO LEAKAGE) ---")
+    if external_memory: print("Mode: external memory (quantized pages streamed from disk)")
     
-    model.fit(
-        X_train, y_train,
-        eval_set=[(X_test, y_test)],
-        verbose=100
-    )
+    # 1. Load Data (memory-mapped feature store)
+    _, columns = feature_store.open_store(TRAIN_DIR)
+    
+    # 2. Train
+    booster, y_test, probs = train(columns, external_memory=external_memory)
     
-    # 6. Evaluate
-    preds = model.predict(X_test)
-    acc = accuracy_score(y_test, preds)
+    # 3. Evaluate
+    acc = accuracy_score(y_test, probs > 0.5)
     print(f"\nREALISTIC ACCURACY: {acc:.2%}")
+    print(f"Log Loss: {log_loss(y_test, probs):.4f}")
     
-    model.save_model(MODEL_FILE)
-    print(f"Model saved to {MODEL_FILE}")
+    version = publish(booster, SPLIT_DATE)
+    print(f"Model v{version} saved to {MODEL_FILE}")
 
 if __name__ == "__main__":
-    train_final()
\ No newline at end of file
+    if "--refresh" in sys.argv:
+        refresh()
+    else:
+        train_final(external_memory="--external-memory" in sys.argv)
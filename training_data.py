@@ -0,0 +1,145 @@
+import numpy as np
+import xgboost as xgb
+import json
+import os
+
+# Import Helpers
+import feature_store
+
+# --- CONFIGURATION ---
+BATCH_ROWS = 100000 # Rows per batch handed to XGBoost
+CACHE_DIR = "xgb_cache" # External-memory pages (see build_matrix)
+
+# Model input order. Same as the old get_dummies(features, columns=['surface']) frame.
+NUMERIC_COLUMNS = [c for c in feature_store.COLUMNS if c not in ('date', 'surface', 'target')]
+SURFACE_COLUMNS = [f"surface_{s}" for s in feature_store.SURFACE_CATEGORIES]
+FEATURE_NAMES = NUMERIC_COLUMNS + SURFACE_COLUMNS
+FEATURE_TYPES = ['int' if feature_store.COLUMNS[c].startswith('int') else 'float' for c in NUMERIC_COLUMNS] + ['i'] * len(SURFACE_COLUMNS)
+
+def mirror_plan(negate_diffs=True):
+    """
+    For each numeric feature, the (source column, sign) to read when P1 and P2
+    are swapped: p1_x <-> p2_x, and the *_diff columns flip sign.
+    """
+    plan = []
+    for c in NUMERIC_COLUMNS:
+        if c.startswith('p1_'): plan.append(('p2_' + c[3:], 1))
+        elif c.startswith('p2_'): plan.append(('p1_' + c[3:], 1))
+        elif c.endswith('_diff') and negate_diffs: plan.append((c, -1))
+        else: plan.append((c, 1))
+    return plan
+
+def to_day(d):
+    """Day number of a 'YYYY-MM-DD' string / datetime64, or d itself if already an int."""
+    if isinstance(d, (int, np.integer)): return int(d)
+    return int(np.datetime64(d, 'D').astype(np.int64))
+
+def split_rows(columns, split_date):
+    """Train/test row indices for a time split, by mask (the store is already chronological)."""
+    before = np.asarray(columns['date']) < to_day(split_date)
+    return np.flatnonzero(before), np.flatnonzero(~before)
+
+def rows_between(columns, start=None, end=None):
+    """Row indices with start <= date < end (either bound may be None). Dates as 'YYYY-MM-DD' or day numbers."""
+    dates = np.asarray(columns['date'])
+    mask = np.ones(len(dates), dtype=bool)
+    if start is not None: mask &= dates >= to_day(start)
+    if end is not None: mask &= dates < to_day(end)
+    return np.flatnonzero(mask)
+
+def as_selector(rows):
+    """A contiguous run of rows becomes a slice, so memmap reads stay views."""
+    if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+        return slice(int(rows[0]), int(rows[-1]) + 1)
+    return rows
+
+class MirrorIter(xgb.DataIter):
+    """
+    Feeds rows of the feature store to XGBoost twice: as stored (winner as P1,
+    label = target) and mirrored (P1/P2 swapped, label = 1 - target). Each
+    batch is assembled straight from the memory-mapped columns; the doubled
+    table never exists as one array or DataFrame.
+    """
+    def __init__(self, columns, rows, negate_diffs=True, batch_rows=BATCH_ROWS, cache_prefix=None):
+        self.columns = columns
+        self.rows = np.asarray(rows)
+        self.batch_rows = batch_rows
+        self.plans = [[(c, 1) for c in NUMERIC_COLUMNS], mirror_plan(negate_diffs)]
+        self.batches = [(half, start) for half in (0, 1) for start in range(0, len(self.rows), batch_rows)]
+        self.pos = 0
+        super().__init__(cache_prefix=cache_prefix, release_data=True)
+
+    def batch(self, half, start):
+        sel = as_selector(self.rows[start:start + self.batch_rows])
+        target = np.asarray(self.columns['target'][sel])
+        block = np.empty((len(target), len(FEATURE_NAMES)), dtype=np.float32)
+        for j, (src, sign) in enumerate(self.plans[half]):
+            block[:, j] = self.columns[src][sel]
+            if sign < 0: np.negative(block[:, j], out=block[:, j])
+        codes = np.asarray(self.columns['surface'][sel])
+        for k in range(len(SURFACE_COLUMNS)):
+            block[:, len(NUMERIC_COLUMNS) + k] = codes == k
+        label = target if half == 0 else 1 - target
+        return block, label.astype(np.float32)
+
+    def next(self, input_data):
+        if self.pos == len(self.batches): return False
+        block, label = self.batch(*self.batches[self.pos])
+        input_data(data=block, label=label, feature_names=FEATURE_NAMES, feature_types=FEATURE_TYPES)
+        self.pos += 1
+        return True
+
+    def reset(self):
+        self.pos = 0
+
+    def labels(self):
+        """Labels in the same order the matrix rows are produced."""
+        target = np.asarray(self.columns['target'][as_selector(self.rows)])
+        return np.concatenate([target, 1 - target]).astype(np.int8)
+
+def build_matrix(columns, rows, negate_diffs=True, ref=None, external_memory=False, name="train"):
+    """
+    Quantized matrix of rows plus their mirrors. Returns (matrix, labels).
+
+    In-memory mode holds every quantized row in RAM (QuantileDMatrix). With
+    external_memory the quantized pages are written under CACHE_DIR and
+    streamed during boosting (ExtMemQuantileDMatrix), so RAM stays bounded by
+    a batch no matter how many rows the store has.
+    """
+    if not external_memory:
+        it = MirrorIter(columns, rows, negate_diffs)
+        return xgb.QuantileDMatrix(it, ref=ref), it.labels()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    it = MirrorIter(columns, rows, negate_diffs, cache_prefix=os.path.join(CACHE_DIR, name))
+    return xgb.ExtMemQuantileDMatrix(it, ref=ref), it.labels()
+
+def dense_matrix(columns, rows, negate_diffs=True):
+    """
+    Rows plus their mirrors as a plain (unquantized) DMatrix. Returns (matrix, labels).
+    For small windows scored or boosted on by a model trained on a different
+    matrix; a QuantileDMatrix would only hold the values bucketed to its own cuts.
+    """
+    it = MirrorIter(columns, rows, negate_diffs)
+    batches = [it.batch(*b) for b in it.batches]
+    label = np.concatenate([y for _, y in batches])
+    matrix = xgb.DMatrix(np.concatenate([X for X, _ in batches]), label=label, feature_names=FEATURE_NAMES, feature_types=FEATURE_TYPES)
+    return matrix, label.astype(np.int8)
+
+def save_booster(booster, path):
+    """
+    Saves in the same layout XGBClassifier.save_model writes, so predictors
+    load it unchanged. Written to a temp file and swapped in, so a reader
+    never sees half a model.
+    """
+    booster.set_attr(scikit_learn=json.dumps({"_estimator_type": "classifier"}))
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.tmp{ext}"
+    booster.save_model(tmp_path)
+    os.replace(tmp_path, path)
+
+def predict_best(booster, matrix):
+    """P1 win probabilities using the early-stopping best iteration, like XGBClassifier."""
+    best = booster.attr('best_iteration')
+    iteration_range = (0, int(best) + 1) if best is not None else (0, 0)
+    return booster.predict(matrix, iteration_range=iteration_range)